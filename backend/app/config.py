@@ -3,9 +3,87 @@ from typing import List
 
 class Settings(BaseSettings):
     GITHUB_TOKEN: str
+    # Extra comma-separated tokens; API calls are spread over all of them
+    GITHUB_TOKENS: str = ""
     GEMINI_API_KEYS: str
     CURRENT_KEY_INDEX: int = 0
+
+    # GitHub HTTP client
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_RAW_URL: str = "https://raw.githubusercontent.com"
+    GITHUB_POOL_SIZE: int = 100
+    GITHUB_POOL_SIZE_PER_HOST: int = 30
+    GITHUB_KEEPALIVE_TIMEOUT: float = 30.0
+    GITHUB_DNS_CACHE_TTL: int = 300
+    GITHUB_REQUEST_TIMEOUT: float = 30.0
+    # Max concurrent sub-requests per analysis; 1 fetches everything serially
+    GITHUB_FANOUT_CONCURRENCY: int = 8
+    # List the whole repo with one recursive Git Trees call instead of the root contents
+    GITHUB_USE_TREE: bool = True
+    # How a repo snapshot is fetched: rest (tree/contents, commits, issues, files)
+    # or graphql (one query; root files only)
+    GITHUB_SNAPSHOT_API: str = "rest"
+    # Last analysis per repo (HEAD sha, listing, file results), so a re-analysis
+    # only fetches what the compare API says changed: memory | sqlite | none
+    GITHUB_SNAPSHOTS: str = "memory"
+    GITHUB_SNAPSHOT_PATH: str = "snapshots.sqlite3"
+    GITHUB_SNAPSHOT_MAX_ENTRIES: int = 1000
+    # Memory store only: snapshots carry README and manifest text
+    GITHUB_SNAPSHOT_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Conditional-request cache for GitHub responses: memory | sqlite | none
+    GITHUB_CACHE_BACKEND: str = "memory"
+    GITHUB_CACHE_PATH: str = "github_cache.sqlite3"
+    GITHUB_CACHE_MAX_ENTRIES: int = 2048
+    GITHUB_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    GITHUB_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+    # Rate limits: quota kept back for essential calls (optional ones are refused
+    # below it), longest wait for a reset, and retries on secondary limits with a
+    # jittered exponential backoff starting at GITHUB_RATE_LIMIT_BACKOFF seconds
+    GITHUB_RATE_LIMIT_RESERVE: int = 50
+    GITHUB_RATE_LIMIT_MAX_WAIT: float = 10.0
+    GITHUB_RATE_LIMIT_RETRIES: int = 3
+    GITHUB_RATE_LIMIT_BACKOFF: float = 1.0
+    # Bytes read per analyzed file (README, .env, manifests); bigger files are range-fetched or cut off
+    GITHUB_MAX_FILE_BYTES: int = 1024 * 1024
+    # README text kept for prompts; the completeness check still sees the whole file
+    GITHUB_README_KEEP_CHARS: int = 256 * 1024
+
+    # Share one Gemini call between concurrent requests with an identical roast prompt
+    AI_COALESCE_ROASTS: bool = True
+    # Generated roasts/READMEs, keyed on repo HEAD SHA, inputs, model and config
+    AI_RESULT_CACHE_TTL: int = 24 * 60 * 60
+    AI_RESULT_CACHE_MAX_ENTRIES: int = 1000
+
+    # Per-key cooldown after a 429 without a Retry-After hint, and how long a
+    # request may wait for a key when all of them are cooling down
+    AI_KEY_COOLDOWN: float = 60.0
+    AI_KEY_MAX_WAIT: float = 5.0
+
+    # Estimated-token budget for a prompt's variable sections (0 disables trimming);
+    # calibration checks the estimate against the model's count_tokens on the first prompts
+    AI_PROMPT_TOKEN_BUDGET: int = 8000
+    AI_TOKEN_CALIBRATION: bool = False
+
+    # Add a Server-Timing header with the per-stage breakdown to API responses
+    SERVER_TIMING: bool = False
+
+    # /analyze-repos: repos analyzed at once and the most accepted per batch
+    BATCH_CONCURRENCY: int = 8
+    BATCH_MAX_REPOS: int = 500
+
+    # Background jobs (/jobs/...): worker count, queued jobs accepted before 429,
+    # and where jobs live: memory | sqlite (survives restarts)
+    JOB_WORKERS: int = 4
+    JOB_MAX_QUEUE: int = 100
+    JOB_STORE: str = "memory"
+    JOB_STORE_PATH: str = "jobs.sqlite3"
+    JOB_MAX_STORED: int = 1000
     
+    @property
+    def github_tokens_list(self) -> List[str]:
+        return [token.strip() for token in self.GITHUB_TOKENS.split(',') if token.strip()]
+
     @property
     def api_keys_list(self) -> List[str]:
         return [key.strip() for key in self.GEMINI_API_KEYS.split(',')]
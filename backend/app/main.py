@@ -1,17 +1,95 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+import asyncio
+import json
+import time
 from .config import settings
-from .services import github_service, ai_service
+from .services import get_ai_service, get_github_service, get_job_queue, reset_services
+from .services.ai_service import CacheMiss
+from .services.job_queue import Job, QueueFull
+from .services.rate_limit import GitHubRateLimited
+from .services.metrics import http_request_seconds, metrics, request_spans, server_timing, span
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built here, not at import, and the Gemini SDK only loads on first use
+    github_service, job_queue = get_github_service(), get_job_queue()
+    # Open the pooled GitHub session once and share it across requests
+    await github_service.start()
+    await job_queue.start(run_job, describe_error)
+    yield
+    await job_queue.close()
+    await github_service.close()
+    reset_services()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add root endpoint for health check
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Code Critic API is running"}
 
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    # Stages recorded anywhere below this request (GitHub, prompt, Gemini) land in `spans`
+    spans = []
+    token = request_spans.set(spans)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_spans.reset(token)
+    route = request.scope.get("route")
+    http_request_seconds.observe(
+        time.perf_counter() - started,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+    # Streaming responses send headers before generation starts, so they only show the analysis
+    if settings.SERVER_TIMING and spans:
+        response.headers["Server-Timing"] = server_timing(spans)
+    return response
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+metrics.gauge(
+    "codecritic_github_rate_limit_remaining", "Quota GitHub last reported per token and resource",
+    ("token", "resource"),
+    lambda: {
+        (t["token"] or "anonymous", resource): quota["remaining"]
+        for t in get_github_service().scheduler.stats()["tokens"]
+        for resource, quota in t["resources"].items()
+    },
+)
+metrics.gauge(
+    "codecritic_jobs", "Background jobs by state", ("state",),
+    lambda: {(state,): get_job_queue().stats()[state] for state in ("queued", "running")},
+)
+def cache_entries() -> dict:
+    github_cache = get_github_service().cache
+    return {
+        ("github",): github_cache.stats()["entries"] if github_cache else None,
+        ("result",): get_ai_service().result_cache.stats()["entries"],
+    }
+
+metrics.gauge("codecritic_cache_entries", "Entries held per cache", ("cache",), cache_entries)
+
+@app.get("/github/rate-limit")
+async def github_rate_limit():
+    """Quota GitHub last reported for each token in the pool."""
+    return get_github_service().scheduler.stats()
+
+@app.get("/gemini/keys")
+async def gemini_keys():
+    """Load, cooldowns and 429s for each Gemini API key in the pool (keys masked)."""
+    return {"keys": get_ai_service().key_pool.stats()}
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://codecritic.arnabjk008.tech", "http://localhost:5173", "http://localhost:3000"],
@@ -26,92 +104,310 @@ class RepoRequest(BaseModel):
     features: Optional[str] = None
     setup: Optional[str] = None
     environment: Optional[str] = None
+    # bypass: always regenerate, prefer: reuse a result for the same commit, only: never generate
+    cache: Literal["bypass", "prefer", "only"] = "prefer"
 
-@app.post("/analyze-repo")
-async def analyze_repo(repo_request: RepoRequest):
-    try:
-        parts = repo_request.repo_url.rstrip('/').split('/')
-        if len(parts) < 5:
-            raise HTTPException(status_code=400, detail="Invalid repository URL")
-        
-        owner, repo = parts[-2:]
-        
-        # Analyze repository structure
-        analysis = await github_service.analyze_repo_structure(owner, repo)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Repository not found")
-            
-        # Generate roast using AI
-        roast = await ai_service.generate_roast(analysis)
-        
-        # Determine README status message
-        readme_status = {
-            "has_readme": analysis.get("has_readme", False),
-            "needs_update": analysis.get("readme_needs_update", False),
-            "message": None
-        }
+class RepoBatchRequest(BaseModel):
+    # Either explicit repo URLs, an org (or user) whose repos are listed, or both
+    repo_urls: List[str] = []
+    org: Optional[str] = None
+    limit: Optional[int] = Field(None, gt=0)
+    cache: Literal["bypass", "prefer", "only"] = "prefer"
+
+def parse_repo_url(repo_url: str):
+    parts = repo_url.rstrip('/').split('/')
+    if len(parts) < 5:
+        raise HTTPException(status_code=400, detail="Invalid repository URL")
+    return parts[-2], parts[-1]
+
+async def fetch_analysis(repo_request: RepoRequest) -> dict:
+    owner, repo = parse_repo_url(repo_request.repo_url)
+    
+    # Analyze repository structure
+    analysis = await get_github_service().analyze_repo_structure(owner, repo)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    return analysis
+
+def roast_analysis(analysis: dict) -> dict:
+    # Determine README status message
+    readme_status = {
+        "has_readme": analysis.get("has_readme", False),
+        "needs_update": analysis.get("readme_needs_update", False),
+        "message": None
+    }
+    
+    if analysis.get("has_readme"):
+        readme_status["message"] = "To generate a new README, please delete the existing README.md from your repository first."
+    
+    return {
+        "has_readme": analysis.get("has_readme", False),
+        "readme_needs_update": analysis.get("readme_needs_update", False),
+        "file_structure": analysis.get("file_structure", []),
+        "open_issues": analysis.get("open_issues", []),
+        "recent_commits": analysis.get("recent_commits", []),
+        "readme_status": readme_status
+    }
+
+def needs_description(analysis: dict, repo_request: RepoRequest) -> bool:
+    return not analysis.get('readme_content') and not repo_request.project_description
+
+def add_readme_details(analysis: dict, repo_request: RepoRequest):
+    # Add description and other details to analysis if provided
+    if repo_request.project_description:
+        analysis['project_description'] = repo_request.project_description
+    if repo_request.features:
+        analysis['project_features'] = repo_request.features
+    if repo_request.setup:
+        analysis['setup_instructions'] = repo_request.setup
+    if repo_request.environment:
+        analysis['environment_variables'] = repo_request.environment
+
+NEEDS_DESCRIPTION_RESPONSE = {
+    "needsDescription": True,
+    "analysis": {
+        "readme_needs_update": True
+    }
+}
+
+async def roast_response(repo_request: RepoRequest, stage=span) -> dict:
+    with stage("analysis"):
+        analysis = await fetch_analysis(repo_request)
         
-        if analysis.get("has_readme"):
-            readme_status["message"] = "To generate a new README, please delete the existing README.md from your repository first."
+    # Generate roast using AI
+    with stage("generation"):
+        roast, cache_info = await get_ai_service().generate_cached("roast", analysis, repo_request.cache)
+    
+    return {
+        "roast": roast,
+        "analysis": roast_analysis(analysis),
+        "cache": cache_info,
+        "prompt": analysis.get("prompt_stats")
+    }
+
+async def readme_response(repo_request: RepoRequest, stage=span) -> dict:
+    with stage("analysis"):
+        analysis = await fetch_analysis(repo_request)
+    
+    # Check if we need project description
+    if needs_description(analysis, repo_request):
+        return NEEDS_DESCRIPTION_RESPONSE
         
-        return {
-            "roast": roast,
-            "analysis": {
-                "has_readme": analysis.get("has_readme", False),
-                "readme_needs_update": analysis.get("readme_needs_update", False),
-                "file_structure": analysis.get("file_structure", []),
-                "open_issues": analysis.get("open_issues", []),
-                "recent_commits": analysis.get("recent_commits", []),
-                "readme_status": readme_status
-            }
-        }
+    add_readme_details(analysis, repo_request)
         
+    # Generate readme using AI
+    with stage("generation"):
+        readme, cache_info = await get_ai_service().generate_cached("readme", analysis, repo_request.cache)
+    
+    return {
+        "readme": readme,
+        "needsDescription": False,
+        "analysis": {
+            "readme_needs_update": analysis.get("readme_needs_update", False)
+        },
+        "cache": cache_info,
+        "prompt": analysis.get("prompt_stats")
+    }
+
+def describe_error(error: Exception) -> dict:
+    # Same status codes and details the synchronous endpoints respond with
+    if isinstance(error, HTTPException):
+        return {"status_code": error.status_code, "detail": error.detail}
+    if isinstance(error, CacheMiss):
+        return {"status_code": 404, "detail": str(error)}
+    if isinstance(error, GitHubRateLimited):
+        # Throttled by GitHub, not a missing repository
+        return {"status_code": 429, "detail": str(error),
+                "headers": {"Retry-After": str(max(1, round(error.retry_after)))}}
+    return {"status_code": 500, "detail": str(error)}
+
+@app.post("/analyze-repo")
+async def analyze_repo(repo_request: RepoRequest):
+    try:
+        return await roast_response(repo_request)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(**describe_error(e))
 
 @app.post("/generate-readme")
 async def generate_readme(repo_request: RepoRequest):
     try:
-        parts = repo_request.repo_url.rstrip('/').split('/')
-        if len(parts) < 5:
-            raise HTTPException(status_code=400, detail="Invalid repository URL")
-        
-        owner, repo = parts[-2:]
-        
-        # Analyze repository structure
-        analysis = await github_service.analyze_repo_structure(owner, repo)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        # Check if we need project description
-        if not analysis.get('readme_content') and not repo_request.project_description:
-            return {
-                "needsDescription": True,
-                "analysis": {
-                    "readme_needs_update": True
-                }
-            }
-            
-        # Add description and other details to analysis if provided
-        if repo_request.project_description:
-            analysis['project_description'] = repo_request.project_description
-        if repo_request.features:
-            analysis['project_features'] = repo_request.features
-        if repo_request.setup:
-            analysis['setup_instructions'] = repo_request.setup
-        if repo_request.environment:
-            analysis['environment_variables'] = repo_request.environment
-            
-        # Generate readme using AI
-        readme = await ai_service.generate_readme(analysis)
-        
-        return {
-            "readme": readme,
-            "needsDescription": False,
-            "analysis": {
-                "readme_needs_update": analysis.get("readme_needs_update", False)
+        return await readme_response(repo_request)
+    except Exception as e:
+        raise HTTPException(**describe_error(e))
+
+JOB_HANDLERS = {
+    "roast": roast_response,
+    "readme": readme_response,
+}
+
+async def run_job(job: Job) -> dict:
+    @contextmanager
+    def stage(name: str):
+        with job.stage(name), span(name):
+            yield
+
+    return await JOB_HANDLERS[job.kind](RepoRequest(**job.payload), stage)
+
+def submit_job(kind: str, repo_request: RepoRequest) -> dict:
+    parse_repo_url(repo_request.repo_url)
+    try:
+        job = get_job_queue().submit(kind, repo_request.model_dump())
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return {"job_id": job.id, "status": job.status, "poll": f"/jobs/{job.id}"}
+
+@app.post("/jobs/analyze-repo", status_code=202)
+async def analyze_repo_job(repo_request: RepoRequest):
+    """Queue a roast; poll GET /jobs/{job_id} for the /analyze-repo response."""
+    return submit_job("roast", repo_request)
+
+@app.post("/jobs/generate-readme", status_code=202)
+async def generate_readme_job(repo_request: RepoRequest):
+    """Queue a README; poll GET /jobs/{job_id} for the /generate-readme response."""
+    return submit_job("readme", repo_request)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+async def batch_results(repo_urls: List[str], cache_mode: str):
+    """Yield one NDJSON line per repo as each finishes, then a summary line."""
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    started = time.perf_counter()
+
+    async def analyze(repo_url: str) -> dict:
+        async with semaphore:
+            try:
+                result = await roast_response(RepoRequest(repo_url=repo_url, cache=cache_mode))
+            except Exception as e:
+                # One bad repo is reported inline and does not stop the batch
+                return {"repo_url": repo_url, "ok": False, "error": describe_error(e)}
+            return {"repo_url": repo_url, "ok": True, **result}
+
+    tasks = [asyncio.ensure_future(analyze(repo_url)) for repo_url in repo_urls]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += result["ok"]
+            yield json.dumps(result) + "\n"
+    finally:
+        # Client went away: stop the analyses that have not finished
+        for task in tasks:
+            task.cancel()
+    yield json.dumps({
+        "done": True,
+        "total": len(repo_urls),
+        "succeeded": succeeded,
+        "failed": len(repo_urls) - succeeded,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }) + "\n"
+
+@app.post("/analyze-repos")
+async def analyze_repos(batch: RepoBatchRequest):
+    """Roast many repos; NDJSON lines arrive in completion order, not request order."""
+    repo_urls = list(batch.repo_urls)
+    if batch.org:
+        try:
+            # One past the cap is enough to reject an oversized org without paging through all of it
+            limit = min(batch.limit or settings.BATCH_MAX_REPOS + 1, settings.BATCH_MAX_REPOS + 1)
+            names = await get_github_service().list_owner_repos(batch.org, limit=limit)
+        except Exception as e:
+            raise HTTPException(**describe_error(e))
+        if names is None:
+            raise HTTPException(status_code=404, detail="Organization or user not found")
+        repo_urls.extend(f"https://github.com/{name}" for name in names)
+    repo_urls = list(dict.fromkeys(repo_urls))
+    if not repo_urls:
+        raise HTTPException(status_code=400, detail="No repositories to analyze")
+    if len(repo_urls) > settings.BATCH_MAX_REPOS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_REPOS} repositories per batch")
+    return StreamingResponse(batch_results(repo_urls, batch.cache), media_type="application/x-ndjson")
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_generation(kind: str, analysis: dict, repo_request: RepoRequest, cached, done_payload):
+    """Yield `chunk` events for a roast/README, then `done` with the full result.
+
+    Streamed text is stored in the result cache once it is complete, so a
+    later non-streaming call for the same commit is a hit.
+    """
+    try:
+        if cached is not None:
+            text, cache_info = cached
+            yield sse_event("chunk", {"text": text})
+        else:
+            parts = []
+            async for chunk in get_ai_service().stream_text(kind, analysis):
+                parts.append(chunk)
+                yield sse_event("chunk", {"text": chunk})
+            text = "".join(parts)
+            get_ai_service().store_result(kind, analysis, text)
+            cache_info = {"mode": repo_request.cache, "hit": False}
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    yield sse_event("done", done_payload(text, cache_info))
+
+@app.post("/analyze-repo/stream")
+async def analyze_repo_stream(repo_request: RepoRequest):
+    """Server-Sent Events: `analysis`, then `chunk`s of the roast, then `done`."""
+    try:
+        with span("analysis"):
+            analysis = await fetch_analysis(repo_request)
+        cached = get_ai_service().lookup_result("roast", analysis, repo_request.cache)
+    except Exception as e:
+        raise HTTPException(**describe_error(e))
+
+    result = roast_analysis(analysis)
+
+    async def events():
+        yield sse_event("analysis", result)
+        async for event in stream_generation(
+            "roast", analysis, repo_request, cached,
+            lambda roast, cache_info: {
+                "roast": roast, "analysis": result, "cache": cache_info, "prompt": analysis.get("prompt_stats")
             }
-        }
-        
+        ):
+            yield event
+
+    return sse_response(events())
+
+@app.post("/generate-readme/stream")
+async def generate_readme_stream(repo_request: RepoRequest):
+    """Server-Sent Events: `analysis`, then `chunk`s of the README, then `done`."""
+    try:
+        with span("analysis"):
+            analysis = await fetch_analysis(repo_request)
+        if needs_description(analysis, repo_request):
+            return sse_response(iter([sse_event("done", NEEDS_DESCRIPTION_RESPONSE)]))
+        add_readme_details(analysis, repo_request)
+        cached = get_ai_service().lookup_result("readme", analysis, repo_request.cache)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(**describe_error(e))
+
+    result = {"readme_needs_update": analysis.get("readme_needs_update", False)}
+
+    async def events():
+        yield sse_event("analysis", result)
+        async for event in stream_generation(
+            "readme", analysis, repo_request, cached,
+            lambda readme, cache_info: {
+                "readme": readme, "needsDescription": False, "analysis": result,
+                "cache": cache_info, "prompt": analysis.get("prompt_stats")
+            }
+        ):
+            yield event
+
+    return sse_response(events())
@@ -1,8 +1,62 @@
+import threading
 from .github_service import GitHubService
+from .github_cache import create_response_cache
 from .ai_service import AIService
+from .job_queue import JobQueue, create_job_store
+from .snapshot_store import create_snapshot_store
 from ..config import settings
 
-github_service = GitHubService(settings.GITHUB_TOKEN)
-ai_service = AIService()
+# Services are built on first use (normally by the app lifespan), once per process
+_instances = {}
+_lock = threading.Lock()
 
-__all__ = ['github_service', 'ai_service']
+def _singleton(name: str, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+def _create_github_service() -> GitHubService:
+    return GitHubService(
+        settings.GITHUB_TOKEN,
+        extra_tokens=settings.github_tokens_list,
+        cache=create_response_cache(
+            settings.GITHUB_CACHE_BACKEND,
+            settings.GITHUB_CACHE_PATH,
+            settings.GITHUB_CACHE_MAX_ENTRIES,
+            settings.GITHUB_CACHE_MAX_BYTES,
+            settings.GITHUB_CACHE_MAX_ENTRY_BYTES,
+        ),
+        snapshots=create_snapshot_store(
+            settings.GITHUB_SNAPSHOTS,
+            settings.GITHUB_SNAPSHOT_PATH,
+            settings.GITHUB_SNAPSHOT_MAX_ENTRIES,
+            settings.GITHUB_SNAPSHOT_MAX_BYTES,
+        ),
+    )
+
+def _create_job_queue() -> JobQueue:
+    return JobQueue(
+        create_job_store(settings.JOB_STORE, settings.JOB_STORE_PATH, settings.JOB_MAX_STORED),
+        settings.JOB_WORKERS,
+        settings.JOB_MAX_QUEUE,
+    )
+
+def get_github_service() -> GitHubService:
+    return _singleton("github", _create_github_service)
+
+def get_ai_service() -> AIService:
+    return _singleton("ai", AIService)
+
+def get_job_queue() -> JobQueue:
+    return _singleton("jobs", _create_job_queue)
+
+def reset_services():
+    """Forget the current instances (after the lifespan closed them)."""
+    with _lock:
+        _instances.clear()
+
+__all__ = ['get_github_service', 'get_ai_service', 'get_job_queue', 'reset_services']
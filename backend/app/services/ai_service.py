@@ -1,10 +1,45 @@
-import google.generativeai as genai
+from typing import AsyncIterator, Callable, Optional, Tuple
+import hashlib
+import json
+from .prompt_budget import (
+    PromptSection,
+    TokenEstimator,
+    fit_sections,
+    format_manifests,
+    readme_outline,
+    sample_paths,
+    summarize_dependencies,
+    truncate_text,
+)
+from .fingerprint import detect_languages, fingerprint_manifests
+from .repo_tree import RepoTree
+from .metrics import cache_events, gemini_key_rotations, gemini_requests, prompt_tokens, span
+from .key_pool import KEYS_EXHAUSTED_MESSAGE, ApiKeyPool, KeysExhausted, is_rate_limited
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
 from ..config import settings
 
+TOKEN_CALIBRATION_SAMPLES = 5
+README_INPUT_FIELDS = ("project_description", "project_features", "setup_instructions", "environment_variables")
+
+class CacheMiss(LookupError):
+    """Raised for cache mode "only" when no cached result exists."""
+
 class AIService:
+    model_name = 'gemini-1.5-pro'
+    roast_generation_config = {
+        'temperature': 0.8,
+        'top_p': 0.9,
+        'top_k': 40,
+    }
+    readme_generation_config = {
+        'temperature': 0.2,  # Lower temperature for more accurate output
+        'top_p': 0.8,
+        'top_k': 40,
+        'max_output_tokens': 2048  # Ensure enough length for detailed README
+    }
+
     def __init__(self):
-        self.model = None
-        self.current_key_index = 0
         self.api_keys = settings.api_keys_list
         self.safety_settings = [
             {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -12,84 +47,232 @@ class AIService:
             {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
             {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
         ]
-        self.initialize(self.api_keys[0])
-    
-    def rotate_api_key(self):
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        new_key = self.api_keys[self.current_key_index]
-        self.initialize(new_key)
-        return new_key
-
-    def initialize(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
-    
-    async def generate_roast(self, repo_analysis: dict) -> str:
-        for _ in range(len(self.api_keys)):  # Try all keys
+        self.roast_flight = SingleFlight()
+        self.token_estimator = TokenEstimator()
+        self.result_cache = ResultCache(settings.AI_RESULT_CACHE_TTL, settings.AI_RESULT_CACHE_MAX_ENTRIES)
+        self.key_pool = ApiKeyPool(
+            self.api_keys,
+            self._create_model,
+            default_cooldown=settings.AI_KEY_COOLDOWN,
+            max_wait=settings.AI_KEY_MAX_WAIT,
+        )
+
+    def _create_model(self, api_key: str):
+        # The SDK takes about a second to import, so the first Gemini call pays for it, not startup
+        import google.generativeai as genai
+        from google.ai import generativelanguage as glm
+
+        model = genai.GenerativeModel(self.model_name)
+        # A client per key instead of genai.configure(), which swaps the key for the whole process.
+        # _async_client is private to the (pinned) SDK: refuse to run if it changed rather
+        # than silently falling back to the shared, globally configured client.
+        if not hasattr(model, "_async_client"):
+            raise RuntimeError(
+                "google-generativeai no longer exposes GenerativeModel._async_client; "
+                "per-key Gemini clients need the version pinned in requirements.txt"
+            )
+        model._async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+        return model
+
+    async def _attempts(self, kind: str, prompt: str,
+                        call: Callable[[object], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Run ``call(model)`` on a leased key and yield what it yields.
+
+        Each attempt leases the least-loaded healthy key; a 429 cools that
+        key down and retries on another, unless text has already been yielded.
+        """
+        for _ in range(2 * len(self.api_keys)):
+            async with self.key_pool.lease() as key:
+                await self._calibrate_tokens(key.model, prompt)
+                started = False
+                try:
+                    with span(f"gemini.{kind}"):
+                        async for text in call(key.model):
+                            started = True
+                            yield text
+                    gemini_requests.inc(kind=kind, outcome="ok")
+                    return
+                except Exception as e:
+                    if is_rate_limited(e) and not started:
+                        gemini_requests.inc(kind=kind, outcome="rate_limited")
+                        gemini_key_rotations.inc()
+                        self.key_pool.mark_rate_limited(key, e)
+                        continue
+                    gemini_requests.inc(kind=kind, outcome="error")
+                    self.key_pool.mark_failed(key)
+                    raise
+        raise KeysExhausted(KEYS_EXHAUSTED_MESSAGE)
+
+    async def _generate(self, kind: str, prompt: str, generation_config: dict) -> str:
+        async def call(model):
+            response = await model.generate_content_async(
+                prompt,
+                safety_settings=self.safety_settings,
+                generation_config=generation_config
+            )
+            yield response.text
+
+        # Drained rather than returning on the first text, so the lease and metrics finish here
+        return "".join([text async for text in self._attempts(kind, prompt, call)])
+
+    def _build_prompt(self, kind: str, repo_analysis: dict) -> Tuple[str, dict]:
+        with span("prompt"):
+            if kind == "roast":
+                prompt, config = self._create_roast_prompt(repo_analysis), self.roast_generation_config
+            else:
+                prompt, config = self._create_readme_prompt(repo_analysis), self.readme_generation_config
+        prompt_tokens.inc(repo_analysis['prompt_stats']['estimated_tokens'], kind=kind)
+        return prompt, config
+
+    async def _calibrate_tokens(self, model, prompt: str):
+        if not settings.AI_TOKEN_CALIBRATION or self.token_estimator.calibrations >= TOKEN_CALIBRATION_SAMPLES:
+            return
+        try:
+            result = await model.count_tokens_async(prompt)
+        except Exception:
+            # Calibration is best-effort; the estimate keeps its current ratio
+            return
+        self.token_estimator.calibrate(prompt, result.total_tokens)
+
+    async def generate_cached(self, kind: str, repo_analysis: dict, cache_mode: str = "prefer") -> Tuple[str, dict]:
+        """Generate a roast or README, reusing results for the same commit.
+
+        Returns the text and cache info for the response. Mode "bypass"
+        always regenerates (and refreshes the cache), "prefer" serves a hit
+        when there is one, and "only" raises CacheMiss instead of generating.
+        """
+        cached = self.lookup_result(kind, repo_analysis, cache_mode)
+        if cached is not None:
+            return cached
+
+        if kind == "roast":
             try:
-                prompt = self._create_roast_prompt(repo_analysis)
-                response = await self.model.generate_content_async(
-                    prompt,
-                    safety_settings=self.safety_settings,
-                    generation_config={
-                        'temperature': 0.8,
-                        'top_p': 0.9,
-                        'top_k': 40,
-                    }
-                )
-                return response.text
+                text = await self._roast(repo_analysis)
             except Exception as e:
-                if "429" in str(e) and self.current_key_index < len(self.api_keys) - 1:
-                    self.rotate_api_key()
-                    continue
-                return f"Failed to generate roast: {str(e)}"
-        return "All API keys have been exhausted. Please try again later."
-    
-    async def generate_readme(self, repo_analysis: dict) -> str:
-        try:
-            prompt = self._create_readme_prompt(repo_analysis)
-            response = await self.model.generate_content_async(
+                return self._roast_failure_message(e), {"mode": cache_mode, "hit": False}
+        else:
+            text = await self.generate_readme(repo_analysis)
+        self.store_result(kind, repo_analysis, text)
+        return text, {"mode": cache_mode, "hit": False}
+
+    def lookup_result(self, kind: str, repo_analysis: dict, cache_mode: str = "prefer") -> Optional[Tuple[str, dict]]:
+        key = self._result_cache_key(kind, repo_analysis)
+        if key is not None and cache_mode != "bypass":
+            cached = self.result_cache.lookup(key)
+            cache_events.inc(cache="result", event="miss" if cached is None else "hit")
+            if cached is not None:
+                text, age = cached
+                return text, {"mode": cache_mode, "hit": True, "age_seconds": round(age, 3)}
+        if cache_mode == "only":
+            raise CacheMiss(f"No cached {kind} for this commit")
+        return None
+
+    def store_result(self, kind: str, repo_analysis: dict, text: str):
+        key = self._result_cache_key(kind, repo_analysis)
+        if key is not None:
+            self.result_cache.store(key, text)
+
+    async def stream_text(self, kind: str, repo_analysis: dict) -> AsyncIterator[str]:
+        """Yield a roast or README as Gemini produces it."""
+        prompt, config = self._build_prompt(kind, repo_analysis)
+
+        async def call(model):
+            response = await model.generate_content_async(
                 prompt,
                 safety_settings=self.safety_settings,
-                generation_config={
-                    'temperature': 0.2,  # Lower temperature for more accurate output
-                    'top_p': 0.8,
-                    'top_k': 40,
-                    'max_output_tokens': 2048  # Ensure enough length for detailed README
-                }
+                generation_config=config,
+                stream=True
             )
-            return response.text
+            async for chunk in response:
+                yield chunk.text
+
+        async for text in self._attempts(kind, prompt, call):
+            yield text
+
+    def _result_cache_key(self, kind: str, analysis: dict):
+        # Without a commit SHA there is nothing that pins the repo's state
+        if not analysis.get('head_sha'):
+            return None
+        payload = {
+            "kind": kind,
+            "repo": analysis.get('full_name'),
+            "sha": analysis['head_sha'],
+            "model": self.model_name,
+            "config": self.roast_generation_config if kind == "roast" else self.readme_generation_config,
+            "inputs": {} if kind == "roast" else {
+                field: " ".join(str(analysis.get(field) or "").split()) for field in README_INPUT_FIELDS
+            },
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    
+    async def generate_roast(self, repo_analysis: dict) -> str:
+        try:
+            return await self._roast(repo_analysis)
         except Exception as e:
-            if "429" in str(e) and self.current_key_index < len(self.api_keys) - 1:
-                self.rotate_api_key()
-                return await self.generate_readme(repo_analysis)
-            raise e
+            return self._roast_failure_message(e)
+
+    def _roast_failure_message(self, error: Exception) -> str:
+        if isinstance(error, KeysExhausted):
+            return KEYS_EXHAUSTED_MESSAGE
+        return f"Failed to generate roast: {str(error)}"
+
+    async def _roast(self, repo_analysis: dict) -> str:
+        prompt, config = self._build_prompt("roast", repo_analysis)
+        if not settings.AI_COALESCE_ROASTS:
+            return await self._generate("roast", prompt, config)
+        # Identical prompts in flight at the same time get the same roast
+        key = hashlib.sha256(prompt.encode()).hexdigest()
+        return await self.roast_flight.do(key, lambda: self._generate("roast", prompt, config))
+    
+    async def generate_readme(self, repo_analysis: dict) -> str:
+        prompt, config = self._build_prompt("readme", repo_analysis)
+        return await self._generate("readme", prompt, config)
 
     def _create_roast_prompt(self, analysis: dict) -> str:
         readme_status = "no README"
-        env_files = [f for f in analysis.get('file_structure', []) if '.env' in f]
-        readme_files = [f for f in analysis.get('file_structure', []) if 'readme' in f.lower()]
+        file_structure = analysis.get('file_structure', [])
+        env_files = [f for f in file_structure if '.env' in f]
+        readme_files = [f for f in file_structure if 'readme' in f.lower()]
         
         if analysis.get('has_readme'):
             readme_content = analysis.get('readme_content', '').strip()
             readme_status = "empty README" if not readme_content else analysis.get('readme_content')
-        
-        file_stats = f"""
+        manifests = analysis.get('manifests') or {}
+        package_info = format_manifests(manifests)
+        recent_commits = str(analysis.get('recent_commits', []))
+        open_issues = str(analysis.get('open_issues', []))
+        # file_structure is only the root listing; the recursive tree, when there is one,
+        # gives the sampler nested paths to spread across directories
+        tree = analysis.get('tree')
+        paths = tree.paths if tree is not None else file_structure
+
+        sections = [
+            PromptSection("readme", readme_status, lambda n: readme_outline(readme_status, n), weight=3),
+            PromptSection("file_structure", ', '.join(paths), lambda n: sample_paths(paths, n), weight=2),
+            PromptSection("package_info", package_info, lambda n: summarize_dependencies(manifests, n), weight=2),
+            PromptSection("recent_commits", recent_commits, lambda n: truncate_text(recent_commits, n)),
+            PromptSection("open_issues", open_issues, lambda n: truncate_text(open_issues, n)),
+            PromptSection("env_files", ', '.join(env_files) or 'None', lambda n: sample_paths(env_files, n)),
+            PromptSection("readme_files", ', '.join(readme_files) or 'None', lambda n: sample_paths(readme_files, n)),
+        ]
+
+        def render(texts: dict) -> str:
+            file_stats = f"""
         Repository Stats:
-        - {len(env_files)} .env files found: {', '.join(env_files) or 'None'}
-        - {len(readme_files)} README files found: {', '.join(readme_files) or 'None'}
+        - {len(env_files)} .env files found: {texts['env_files']}
+        - {len(readme_files)} README files found: {texts['readme_files']}
         """
         
-        return f"""You are a brutal code critic who finds flaws in everything. Generate exactly 5-6 lines of brutal roasts.
+            return f"""You are a brutal code critic who finds flaws in everything. Generate exactly 5-6 lines of brutal roasts.
 
         Repository Analysis:
         {file_stats}
-        - README Status: {readme_status}
-        - Latest Commits: {analysis.get('recent_commits', [])}
-        - Open Issues: {analysis.get('open_issues', [])}
-        - File Structure: {', '.join(analysis.get('file_structure', []))}
+        - README Status: {texts['readme']}
+        - Latest Commits: {texts['recent_commits']}
+        - Open Issues: {texts['open_issues']}
+        - File Structure: {texts['file_structure']}
         - Security Issues: {len(analysis.get('exposed_secrets', []))}
-        - Package Info: {analysis.get('package_info', 'No dependencies found')}
+        - Package Info: {texts['package_info']}
 
         Rules for Roasting:
         1. Generate 5 to 10 lines of merciless roasts that hit harder than a hangover.
@@ -102,34 +285,42 @@ class AIService:
         8. If they dare to have no README, unleash an extra wave of ridicule for their utter incompetence.
         """
 
+        return self._assemble_prompt(analysis, sections, render)
+
+    def _assemble_prompt(self, analysis: dict, sections: list, render) -> str:
+        """Render a prompt within AI_PROMPT_TOKEN_BUDGET and record its size on the analysis."""
+        budget = settings.AI_PROMPT_TOKEN_BUDGET
+        texts = {section.name: section.text for section in sections}
+        truncated = []
+        if budget > 0:
+            fixed = self.token_estimator.count(render({section.name: "" for section in sections}))
+            texts, truncated = fit_sections(sections, budget - fixed, self.token_estimator)
+        prompt = render(texts)
+        analysis['prompt_stats'] = {
+            "estimated_tokens": self.token_estimator.count(prompt),
+            "budget": budget if budget > 0 else None,
+            "truncated_sections": truncated,
+        }
+        return prompt
+
     def _analyze_project_structure(self, analysis: dict) -> dict:
         """Deeply analyze project structure and tech stack"""
         files = analysis.get('file_structure', [])
-        package_json = analysis.get('package_content', {})
         main_file = analysis.get('main_file_content', '')
         existing_readme = analysis.get('readme_content', '')
 
-        # Framework Detection
-        framework = {
-            "name": None,
-            "type": None,
-            "version": None
-        }
-
-        if "next" in str(package_json):
-            framework = {"name": "Next.js", "type": "fullstack", "version": package_json.get('dependencies', {}).get('next')}
-        elif "react" in str(package_json):
-            framework = {"name": "React", "type": "frontend", "version": package_json.get('dependencies', {}).get('react')}
-        elif "vue" in str(package_json):
-            framework = {"name": "Vue", "type": "frontend", "version": package_json.get('dependencies', {}).get('vue')}
-        elif "express" in str(package_json):
-            framework = {"name": "Express", "type": "backend", "version": package_json.get('dependencies', {}).get('express')}
+        # Framework Detection: each manifest is parsed once and matched against the rule table
+        fingerprint = fingerprint_manifests(analysis.get('manifests') or {})
+        manifest = fingerprint.manifest
+        framework = dict(fingerprint.framework)
 
         # Project Type Detection
+        # The recursive tree has the heuristics precomputed; otherwise index the root listing once
+        tree = analysis.get('tree') or RepoTree(files)
         project_type = None
-        if any(f.endswith(('.tsx', '.jsx', '.vue')) for f in files):
+        if tree.has_extension('.tsx', '.jsx', '.vue'):
             project_type = "frontend"
-        elif any(f.endswith(('.py', 'go', 'rs')) for f in files):
+        elif tree.has_extension('.py', '.go', '.rs'):
             project_type = "backend"
         elif framework["type"] == "fullstack":
             project_type = "fullstack"
@@ -137,14 +328,15 @@ class AIService:
         return {
             "framework": framework,
             "project_type": project_type,
-            "dependencies": package_json.get('dependencies', {}),
-            "dev_dependencies": package_json.get('devDependencies', {}),
-            "scripts": package_json.get('scripts', {}),
-            "has_typescript": any(f.endswith('.ts') or f.endswith('.tsx') for f in files),
-            "has_tests": any('test' in f.lower() or 'spec' in f.lower() for f in files),
-            "has_docker": any('dockerfile' in f.lower() or 'docker-compose' in f.lower() for f in files),
-            "has_ci": any('.github/workflows' in f for f in files),
-            "env_files": [f for f in files if '.env' in f.lower()],
+            "languages": detect_languages(tree),
+            "dependencies": manifest.dependencies,
+            "dev_dependencies": manifest.dev_dependencies,
+            "scripts": manifest.scripts,
+            "has_typescript": tree.has_extension('.ts', '.tsx'),
+            "has_tests": tree.has_tests,
+            "has_docker": tree.has_docker,
+            "has_ci": tree.has_ci,
+            "env_files": tree.env_files,
             "existing_readme": existing_readme
         }
 
@@ -152,34 +344,51 @@ class AIService:
         project_info = self._analyze_project_structure(analysis)
         
         # Get user-provided details
-        project_description = analysis.get('project_description', '')
-        project_features = analysis.get('project_features', '')
-        setup_instructions = analysis.get('setup_instructions', '')
-        env_variables = analysis.get('environment_variables', '')
-        
-        # Create a detailed project overview using user input
-        detailed_overview = f"""
+        project_description = str(analysis.get('project_description', ''))
+        project_features = str(analysis.get('project_features', ''))
+        setup_instructions = str(analysis.get('setup_instructions', ''))
+        env_variables = str(analysis.get('environment_variables', ''))
+        dependencies = str(project_info['dependencies'])
+        dev_dependencies = str(project_info['dev_dependencies'])
+        scripts = str(project_info['scripts'])
+        env_files = project_info['env_files']
+
+        sections = [
+            PromptSection("description", project_description, lambda n: truncate_text(project_description, n), weight=3),
+            PromptSection("features", project_features, lambda n: truncate_text(project_features, n), weight=2),
+            PromptSection("setup", setup_instructions, lambda n: truncate_text(setup_instructions, n), weight=2),
+            PromptSection("env_variables", env_variables, lambda n: truncate_text(env_variables, n)),
+            PromptSection("env_files", str(env_files), lambda n: sample_paths(env_files, n)),
+            PromptSection("dependencies", dependencies, lambda n: truncate_text(dependencies, n)),
+            PromptSection("dev_dependencies", dev_dependencies, lambda n: truncate_text(dev_dependencies, n)),
+            PromptSection("scripts", scripts, lambda n: truncate_text(scripts, n)),
+        ]
+
+        def render(texts: dict) -> str:
+            # Create a detailed project overview using user input
+            detailed_overview = f"""
 User-Provided Project Details:
-- Description: {project_description}
-- Features: {project_features}
-- Setup Steps: {setup_instructions}
-- Environment Variables: {env_variables}
+- Description: {texts['description']}
+- Features: {texts['features']}
+- Setup Steps: {texts['setup']}
+- Environment Variables: {texts['env_variables']}
 
 Technical Analysis:
 - Framework: {project_info['framework']['name']} ({project_info['framework']['version']})
 - Type: {project_info['project_type']}
+- Languages: {', '.join(project_info['languages']) or 'Unknown'}
 - TypeScript: {'Yes' if project_info['has_typescript'] else 'No'}
 - Testing: {'Present' if project_info['has_tests'] else 'Not found'}
 - Docker: {'Configured' if project_info['has_docker'] else 'Not found'}
 - CI/CD: {'Setup' if project_info['has_ci'] else 'Not found'}
-- Environment Files: {project_info['env_files']}
+- Environment Files: {texts['env_files']}
 
-Dependencies: {project_info['dependencies']}
-Dev Dependencies: {project_info['dev_dependencies']}
-Scripts: {project_info['scripts']}
+Dependencies: {texts['dependencies']}
+Dev Dependencies: {texts['dev_dependencies']}
+Scripts: {texts['scripts']}
 """
         
-        return f"""You are an expert technical writer. Generate a comprehensive README.md based on this project analysis.
+            return f"""You are an expert technical writer. Generate a comprehensive README.md based on this project analysis.
 Use the user-provided details as the primary source of information, and complement it with the technical analysis.
 
 {detailed_overview}
@@ -228,5 +437,4 @@ Formatting Rules:
 
 Remember: Create a professional, comprehensive README that combines user-provided information with technical analysis. Make it both informative and easy to follow."""
 
-# Create and export an instance
-ai_service = AIService()
\ No newline at end of file
+        return self._assemble_prompt(analysis, sections, render)
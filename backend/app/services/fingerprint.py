@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import hashlib
+import json
+import re
+
+from .repo_tree import RepoTree
+
+MAX_CACHED_MANIFESTS = 512
+
+# Checked in order; the first rule whose dependency a manifest declares wins.
+# Meta-frameworks come before the libraries they are built on.
+FRAMEWORK_RULES = (
+    ("next", "Next.js", "fullstack"),
+    ("nuxt", "Nuxt", "fullstack"),
+    ("@remix-run/react", "Remix", "fullstack"),
+    ("@sveltejs/kit", "SvelteKit", "fullstack"),
+    ("astro", "Astro", "fullstack"),
+    ("@angular/core", "Angular", "frontend"),
+    ("react", "React", "frontend"),
+    ("vue", "Vue", "frontend"),
+    ("svelte", "Svelte", "frontend"),
+    ("solid-js", "Solid", "frontend"),
+    ("@nestjs/core", "NestJS", "backend"),
+    ("express", "Express", "backend"),
+    ("fastify", "Fastify", "backend"),
+    ("koa", "Koa", "backend"),
+    ("hono", "Hono", "backend"),
+    ("django", "Django", "fullstack"),
+    ("fastapi", "FastAPI", "backend"),
+    ("flask", "Flask", "backend"),
+    ("starlette", "Starlette", "backend"),
+    ("tornado", "Tornado", "backend"),
+    ("aiohttp", "aiohttp", "backend"),
+    ("streamlit", "Streamlit", "frontend"),
+    ("gradio", "Gradio", "frontend"),
+)
+
+# Normalized dependency name -> (priority, framework name, type), built once
+_FRAMEWORKS = {
+    dependency: (priority, name, kind)
+    for priority, (dependency, name, kind) in enumerate(FRAMEWORK_RULES)
+}
+
+LANGUAGE_EXTENSIONS = {
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".py": "Python",
+    ".go": "Go",
+    ".rs": "Rust",
+    ".java": "Java", ".kt": "Kotlin",
+    ".rb": "Ruby",
+    ".php": "PHP",
+    ".cs": "C#",
+    ".c": "C", ".h": "C",
+    ".cpp": "C++", ".cc": "C++", ".hpp": "C++",
+    ".swift": "Swift",
+    ".dart": "Dart",
+    ".vue": "Vue", ".svelte": "Svelte",
+}
+
+_REQUIREMENT = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*([^;#]*)")
+_QUOTED = re.compile(r"[\"']([A-Za-z0-9][^\"']*)[\"']")
+_TABLE_KEY = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*=\s*(.*)$")
+_SEPARATORS = re.compile(r"[-_.]+")
+_POETRY_VERSION = re.compile(r"(?:^|version\s*=\s*)[\"']([^\"']*)")
+_VERSION_OPERATOR = re.compile(r"^[A-Za-z0-9._-]+\s*(\[[^\]]*\])?\s*(==|>=|<=|~=|!=|>|<|@)")
+
+
+@dataclass(frozen=True)
+class Manifest:
+    """Dependencies of a package.json, requirements.txt or pyproject.toml."""
+
+    ecosystem: Optional[str] = None
+    dependencies: Dict[str, str] = field(default_factory=dict)
+    dev_dependencies: Dict[str, str] = field(default_factory=dict)
+    peer_dependencies: Dict[str, str] = field(default_factory=dict)
+    scripts: Dict[str, str] = field(default_factory=dict)
+
+    def requirements(self) -> List[str]:
+        """Every dependency as one short string (``react@^18.2.0``, ``fastapi>=0.100``)."""
+        separator = "@" if self.ecosystem == "npm" else ""
+        return [
+            f"{name}{separator}{version}"
+            for deps in (self.dependencies, self.dev_dependencies, self.peer_dependencies)
+            for name, version in deps.items()
+        ]
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    manifest: Manifest
+    framework: Dict[str, Optional[str]]
+
+
+_cache: "OrderedDict[str, Fingerprint]" = OrderedDict()
+
+
+def normalize_name(name: str) -> str:
+    # PEP 503 for Python packages; npm names are lowercase already
+    name = name.lower()
+    if name.startswith("@") or not ("_" in name or "." in name or "--" in name):
+        return name
+    return _SEPARATORS.sub("-", name)
+
+
+def fingerprint_manifest(text: Optional[str]) -> Fingerprint:
+    """Parse a manifest and match it against the framework rules, memoized by content hash."""
+    text = text or ""
+    digest = hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+    cached = _cache.get(digest)
+    if cached is not None:
+        _cache.move_to_end(digest)
+        return cached
+    manifest = parse_manifest(text)
+    result = Fingerprint(manifest, detect_framework(manifest))
+    _cache[digest] = result
+    while len(_cache) > MAX_CACHED_MANIFESTS:
+        _cache.popitem(last=False)
+    return result
+
+
+def fingerprint_manifests(manifests: Dict[str, str]) -> Fingerprint:
+    """Fingerprint every manifest by file name and merge them.
+
+    Dependencies and scripts are combined (the first file by name wins a
+    clash), so the framework is the highest-priority rule any manifest
+    matches: a Next.js package.json beats a Flask requirements.txt.
+    """
+    fingerprints = [fingerprint_manifest(manifests[name]) for name in sorted(manifests)]
+    if len(fingerprints) <= 1:
+        return fingerprints[0] if fingerprints else fingerprint_manifest(None)
+
+    def merged(attribute: str) -> Dict[str, str]:
+        result = {}
+        for fingerprint in reversed(fingerprints):
+            result.update(getattr(fingerprint.manifest, attribute))
+        return result
+
+    manifest = Manifest(
+        ecosystem=next((f.manifest.ecosystem for f in fingerprints if f.manifest.ecosystem), None),
+        dependencies=merged("dependencies"),
+        dev_dependencies=merged("dev_dependencies"),
+        peer_dependencies=merged("peer_dependencies"),
+        scripts=merged("scripts"),
+    )
+    return Fingerprint(manifest, detect_framework(manifest))
+
+
+def detect_framework(manifest: Manifest) -> Dict[str, Optional[str]]:
+    best = None
+    for deps in (manifest.dependencies, manifest.peer_dependencies, manifest.dev_dependencies):
+        for name, version in deps.items():
+            rule = _FRAMEWORKS.get(normalize_name(name))
+            if rule is not None and (best is None or rule[0] < best[0][0]):
+                best = (rule, version)
+    if best is None:
+        return {"name": None, "type": None, "version": None}
+    (_, name, kind), version = best
+    return {"name": name, "type": kind, "version": version or None}
+
+
+def detect_languages(tree: RepoTree) -> List[str]:
+    """Languages present in the tree, most files first."""
+    counts = {}
+    for extension, paths in tree.by_extension.items():
+        language = LANGUAGE_EXTENSIONS.get(extension)
+        if language:
+            counts[language] = counts.get(language, 0) + len(paths)
+    return sorted(counts, key=counts.get, reverse=True)
+
+
+def parse_manifest(text: str) -> Manifest:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        return _parse_package_json(data)
+    return _parse_python(text)
+
+
+def _parse_package_json(data: dict) -> Manifest:
+    def mapping(key: str) -> Dict[str, str]:
+        value = data.get(key)
+        return {str(k): str(v) for k, v in value.items()} if isinstance(value, dict) else {}
+
+    return Manifest(
+        ecosystem="npm",
+        dependencies=mapping("dependencies"),
+        dev_dependencies=mapping("devDependencies"),
+        peer_dependencies=mapping("peerDependencies"),
+        scripts=mapping("scripts"),
+    )
+
+
+def _parse_python(text: str) -> Manifest:
+    """requirements.txt lines, or pyproject.toml dependency arrays and Poetry tables.
+
+    A line scan rather than a TOML parser: it only needs the dependency
+    lists, and tomllib is not available before Python 3.11.
+    """
+    dependencies, dev_dependencies = {}, {}
+    section = None
+    in_array, array_target = False, dependencies
+
+    def add_requirement(requirement: str, target: dict):
+        match = _REQUIREMENT.match(requirement.strip())
+        if match:
+            target[match.group(1)] = match.group(3).strip()
+
+    for line in text.splitlines():
+        stripped = line.split('#', 1)[0].strip()
+        if not stripped:
+            continue
+        if in_array:
+            in_array = not stripped.startswith(']') and not stripped.endswith(']')
+            for requirement in _QUOTED.findall(stripped):
+                add_requirement(requirement, array_target)
+            continue
+        if stripped.startswith('['):
+            section = stripped.strip('[]').strip()
+            continue
+        if section is None:
+            if stripped.startswith('-') or '://' in stripped:
+                continue
+            # requirements.txt: one requirement per line
+            if '=' not in stripped or _VERSION_OPERATOR.match(stripped):
+                add_requirement(stripped, dependencies)
+            continue
+
+        key = _TABLE_KEY.match(stripped)
+        if key is None:
+            continue
+        name, value = key.groups()
+        dev = "dev" in section or section == "project.optional-dependencies"
+        if section.startswith("tool.poetry") and section.endswith("dependencies"):
+            # [tool.poetry.dependencies]: fastapi = "^0.100" (or an inline table)
+            if name.lower() != "python":
+                version = _POETRY_VERSION.search(value)
+                (dev_dependencies if dev else dependencies)[name] = version.group(1) if version else ""
+        elif section == "project.optional-dependencies" or (section == "project" and name == "dependencies"):
+            # dependencies = ["fastapi>=0.100", ...], possibly over several lines
+            array_target = dev_dependencies if dev else dependencies
+            for requirement in _QUOTED.findall(value):
+                add_requirement(requirement, array_target)
+            in_array = value.startswith('[') and not value.endswith(']')
+
+    ecosystem = "python" if dependencies or dev_dependencies else None
+    return Manifest(ecosystem=ecosystem, dependencies=dependencies, dev_dependencies=dev_dependencies)
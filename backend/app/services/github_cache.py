@@ -0,0 +1,321 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+import json
+import sqlite3
+import time
+
+# Seconds a cached response is served without asking GitHub; after that it is
+# revalidated with If-None-Match / If-Modified-Since. Trees, files and listings
+# fetched at a commit sha never change; at a moving ref (HEAD, a branch) they
+# are capped to the commits TTL so they can not be older than the head sha.
+DEFAULT_TTLS = {
+    "contents": 300,
+    "commits": 60,
+    "issues": 60,
+    "git": 86400,
+    "raw": 86400,
+}
+DEFAULT_TTL = 60
+# The SQLite LRU only records a read when the last one is older than this,
+# so cache hits do not each cost a write and a commit
+ACCESS_RESOLUTION = 60.0
+CACHED_HEADERS = ("Content-Type", "Link")
+
+
+@dataclass
+class CacheEntry:
+    status: int
+    body: bytes
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    ttl: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() - self.stored_at < self.ttl
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+class _BodyReader:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, n: int):
+        for start in range(0, len(self._body), n):
+            yield self._body[start:start + n]
+
+
+class CachedResponse:
+    """Read-only stand-in for an aiohttp response, built from a cache entry."""
+
+    def __init__(self, entry: CacheEntry):
+        self.status = entry.status
+        self.headers = entry.headers
+        self.content = _BodyReader(entry.body)
+        self._body = entry.body
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._body.decode(encoding, errors="replace")
+
+    async def json(self, **kwargs):
+        return json.loads(self._body)
+
+
+class _PrefixedReader:
+    def __init__(self, prefix: bytes, content):
+        self._prefix = prefix
+        self._content = content
+
+    async def iter_chunked(self, n: int):
+        for start in range(0, len(self._prefix), n):
+            yield self._prefix[start:start + n]
+        async for data in self._content.iter_chunked(n):
+            yield data
+
+    async def read(self) -> bytes:
+        return self._prefix + await self._content.read()
+
+
+class PartialResponse:
+    """A live response whose first bytes were already read (while trying to cache it)."""
+
+    def __init__(self, response, prefix: bytes):
+        self.status = response.status
+        self.headers = response.headers
+        self.content = _PrefixedReader(prefix, response.content)
+
+    async def read(self) -> bytes:
+        return await self.content.read()
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return (await self.read()).decode(encoding, errors="replace")
+
+    async def json(self, **kwargs):
+        return json.loads(await self.read())
+
+
+class MemoryCacheBackend:
+    """In-process LRU bounded by entry count and total body bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> int:
+        self.delete(key)
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        evicted = 0
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, old = self._entries.popitem(last=False)
+            self.total_bytes -= old.size
+            evicted += 1
+        return evicted
+
+    def touch(self, key: str, stored_at: float):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.stored_at = stored_at
+            self._entries.move_to_end(key)
+
+    def delete(self, key: str):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU so cached responses and validators survive restarts."""
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                ttl REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._db.commit()
+        # Running totals, so eviction does not rescan the table on every write
+        self._count, self._bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+        ).fetchone()
+
+    # stored_at is wall-clock here (monotonic time does not survive restarts);
+    # it is converted back to the monotonic clock CacheEntry.fresh compares against
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._db.execute(
+            "SELECT status, body, headers, etag, last_modified, stored_at, ttl, last_access"
+            " FROM responses WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, body, headers, etag, last_modified, stored_at, ttl, last_access = row
+        if time.time() - last_access > ACCESS_RESOLUTION:
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        age = time.time() - stored_at
+        return CacheEntry(status, body, json.loads(headers), etag, last_modified, time.monotonic() - age, ttl)
+
+    def set(self, key: str, entry: CacheEntry) -> int:
+        now = time.time()
+        stored_at = now - (time.monotonic() - entry.stored_at)
+        self._forget(key)
+        self._db.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, entry.status, entry.body, json.dumps(entry.headers), entry.etag,
+             entry.last_modified, stored_at, entry.ttl, now),
+        )
+        self._count += 1
+        self._bytes += entry.size
+        evicted = self._evict()
+        self._db.commit()
+        return evicted
+
+    def touch(self, key: str, stored_at: float):
+        now = time.time()
+        self._db.execute(
+            "UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?",
+            (now - (time.monotonic() - stored_at), now, key),
+        )
+        self._db.commit()
+
+    def delete(self, key: str):
+        self._forget(key)
+        self._db.commit()
+
+    def _forget(self, key: str):
+        row = self._db.execute("SELECT LENGTH(body) FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count -= 1
+            self._bytes -= row[0]
+
+    def _evict(self) -> int:
+        evicted = 0
+        while self._count > 0 and (self._count > self.max_entries or self._bytes > self.max_bytes):
+            key, = self._db.execute("SELECT key FROM responses ORDER BY last_access LIMIT 1").fetchone()
+            self._forget(key)
+            evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._db.close()
+
+
+class ResponseCache:
+    """URL-keyed cache of GitHub responses with conditional revalidation."""
+
+    def __init__(self, backend, ttls: Optional[Dict[str, float]] = None, max_entry_bytes: int = 1024 * 1024):
+        self.backend = backend
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None) -> str:
+        if not params:
+            return url
+        query = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        return f"{url}?{query}"
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        return self.backend.get(key)
+
+    def cacheable(self, headers) -> bool:
+        # Large bodies are passed through so callers can stream them. For a
+        # gzip body this is the compressed size, so store() checks again.
+        length = headers.get("Content-Length")
+        return length is None or int(length) <= self.max_entry_bytes
+
+    def conditional_headers(self, entry: CacheEntry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: str, endpoint: str, status: int, body: bytes, headers,
+              max_ttl: Optional[float] = None) -> CacheEntry:
+        ttl = self.ttls.get(endpoint, DEFAULT_TTL)
+        entry = CacheEntry(
+            status=status,
+            body=body,
+            # Link carries pagination for list endpoints
+            headers={name: headers[name] for name in CACHED_HEADERS if name in headers},
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            stored_at=time.monotonic(),
+            ttl=ttl if max_ttl is None else min(ttl, max_ttl),
+        )
+        # Served once but not kept: one oversized body would evict everything else
+        if entry.size <= self.max_entry_bytes:
+            self.evictions += self.backend.set(key, entry)
+        return entry
+
+    def refresh(self, key: str, entry: CacheEntry):
+        entry.stored_at = time.monotonic()
+        self.backend.touch(key, entry.stored_at)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
+
+
+def create_response_cache(backend: str, path: str, max_entries: int, max_bytes: int,
+                          max_entry_bytes: int = 1024 * 1024) -> Optional[ResponseCache]:
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return ResponseCache(SQLiteCacheBackend(path, max_entries, max_bytes), max_entry_bytes=max_entry_bytes)
+    if backend == "memory":
+        return ResponseCache(MemoryCacheBackend(max_entries, max_bytes), max_entry_bytes=max_entry_bytes)
+    raise ValueError(f"Unknown GitHub cache backend: {backend}")
@@ -1,132 +1,729 @@
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from urllib.parse import quote
+import asyncio
 import base64
+import json
 import re
+from .github_cache import DEFAULT_TTL, CachedResponse, PartialResponse, ResponseCache
+from .graphql_snapshot import is_rate_limited as is_graphql_rate_limited, snapshot_query
+from .metrics import cache_events, github_bytes, github_requests, github_truncated_downloads, span
+from .rate_limit import GitHubRateLimited, RateLimitScheduler
+from .repo_tree import RepoTree
+from .scanner import LineChunker, ReadmeCheck, SecretScanner, default_secret_scanner
+from .single_flight import SingleFlight
+from .snapshot_store import RepoSnapshot
 from ..config import settings
 
+# Upper bound on nested .env files downloaded per analysis in tree mode
+MAX_NESTED_ENV_FILES = 25
+# Bigger diffs (or ones GitHub cuts off) are cheaper to re-analyze from scratch
+MAX_COMPARE_FILES = 300
+STREAM_CHUNK_SIZE = 64 * 1024
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+class TextCollector:
+    """Stream consumer that just keeps the text."""
+
+    def __init__(self):
+        self._parts = []
+
+    def feed(self, text: str):
+        self._parts.append(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+def _next_page(link: str) -> Optional[str]:
+    match = re.search(r'<([^>]+)>;\s*rel="next"', link)
+    return match.group(1) if match else None
+
 class GitHubService:
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        base_url: Optional[str] = None,
+        raw_url: Optional[str] = None,
+        fanout_concurrency: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        use_tree: Optional[bool] = None,
+        secret_scanner: Optional[SecretScanner] = None,
+        extra_tokens: Optional[List[str]] = None,
+        snapshot_api: Optional[str] = None,
+        snapshots=None,
+    ):
         self.token = token
+        # Authorization is added per request by the token the scheduler picks
         self.headers = {
-            "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github.v3+json"
         }
-        self.base_url = "https://api.github.com"
+        self.base_url = (base_url or settings.GITHUB_API_URL).rstrip('/')
+        self.raw_url = (raw_url or settings.GITHUB_RAW_URL).rstrip('/')
+        self.fanout_concurrency = max(1, fanout_concurrency or settings.GITHUB_FANOUT_CONCURRENCY)
+        self.session: Optional[ClientSession] = None
+        self.cache = cache
+        self.secret_scanner = secret_scanner or default_secret_scanner
+        self.use_tree = settings.GITHUB_USE_TREE if use_tree is None else use_tree
+        self.snapshot_api = snapshot_api or settings.GITHUB_SNAPSHOT_API
+        self.snapshots = snapshots
+        self.analysis_flight = SingleFlight()
+        self.scheduler = RateLimitScheduler(
+            [token] + [t for t in extra_tokens or [] if t != token],
+            reserve=settings.GITHUB_RATE_LIMIT_RESERVE,
+            max_wait=settings.GITHUB_RATE_LIMIT_MAX_WAIT,
+            max_retries=settings.GITHUB_RATE_LIMIT_RETRIES,
+            backoff_base=settings.GITHUB_RATE_LIMIT_BACKOFF,
+        )
+
+    async def start(self) -> ClientSession:
+        # One long-lived session so connections (DNS, TCP, TLS) are reused across calls
+        if self.session is None or self.session.closed:
+            connector = TCPConnector(
+                limit=settings.GITHUB_POOL_SIZE,
+                limit_per_host=settings.GITHUB_POOL_SIZE_PER_HOST,
+                keepalive_timeout=settings.GITHUB_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=settings.GITHUB_DNS_CACHE_TTL,
+            )
+            self.session = ClientSession(
+                connector=connector,
+                timeout=ClientTimeout(total=settings.GITHUB_REQUEST_TIMEOUT),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        # The SQLite backends each hold a connection; reset_services() opens new ones
+        for store in (self.cache, self.snapshots):
+            if store is not None:
+                store.close()
+
+    @asynccontextmanager
+    async def _get(self, url: str, low_priority: bool = False, headers: Optional[dict] = None,
+                   stream: bool = False, **kwargs):
+        """GET through the response cache and the rate-limit scheduler.
+
+        Low-priority calls are the optional extras of an analysis: they are
+        refused first when the token pool runs low on quota. With ``stream``
+        at most the cache's entry limit is buffered; a bigger body is handed
+        over with the part already read replayed first, so the caller's own
+        cap still applies.
+        """
+        headers = headers or {}
+        if self.cache is None:
+            async with self._request(url, headers, low_priority, stream=stream, **kwargs) as response:
+                yield response
+            return
+
+        key = self.cache.key(url, kwargs.get("params"))
+        entry = self.cache.lookup(key)
+        if entry is not None and entry.fresh:
+            self.cache.hits += 1
+            cache_events.inc(cache="github", event="hit")
+            yield CachedResponse(entry)
+            return
+
+        if entry is not None:
+            headers = {**headers, **self.cache.conditional_headers(entry)}
+        async with self._request(url, headers, low_priority, stream=stream, **kwargs) as response:
+            if response.status == 304 and entry is not None:
+                # Not modified: served from cache and not counted against the rate limit
+                self.cache.revalidated += 1
+                cache_events.inc(cache="github", event="revalidated")
+                self.cache.refresh(key, entry)
+                yield CachedResponse(entry)
+                return
+            self.cache.misses += 1
+            cache_events.inc(cache="github", event="miss")
+            if response.status != 200 or not self.cache.cacheable(response.headers):
+                yield response
+                return
+            if stream:
+                # Content-Length is the compressed size of a gzip body; cap what is decoded
+                body, complete = await self._read_up_to(response, self.cache.max_entry_bytes)
+                if not complete:
+                    yield PartialResponse(response, body)
+                    return
+            else:
+                body = await response.read()
+            if stream or not response.content_length:
+                github_bytes.inc(len(body), endpoint=self._endpoint(url))
+            entry = self.cache.store(key, self._endpoint(url), response.status, body, response.headers,
+                                     max_ttl=self._ttl_cap(url, kwargs.get("params")))
+        yield CachedResponse(entry)
+
+    async def _read_up_to(self, response, limit: int):
+        """The body if it is at most ``limit`` bytes, else the part read so far; and whether it is whole."""
+        parts, size = [], 0
+        async for data in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            parts.append(data)
+            size += len(data)
+            if size > limit:
+                return b"".join(parts), False
+        return b"".join(parts), True
+
+    @asynccontextmanager
+    async def _request(self, url: str, headers: dict, low_priority: bool, method: str = "GET",
+                       stream: bool = False, **kwargs):
+        session = await self.start()
+        if url.startswith(self.raw_url):
+            # raw.githubusercontent.com does not count against the API quota
+            headers = {**self.headers, **self.scheduler.tokens[0].headers, **headers}
+            with span("github.raw"):
+                async with session.get(url, headers=headers, **kwargs) as response:
+                    self._record(response, "raw", stream)
+                    yield response
+            return
+
+        endpoint = self._endpoint(url)
+        # Every REST endpoint here draws on the core quota; GraphQL has its own
+        resource = "graphql" if endpoint == "graphql" else "core"
+        for attempt in range(self.scheduler.max_retries + 1):
+            async with self.scheduler.lease(low_priority, resource) as token:
+                with span(f"github.{endpoint}"):
+                    request_headers = {**self.headers, **token.headers, **headers}
+                    async with session.request(method, url, headers=request_headers, **kwargs) as response:
+                        self._record(response, endpoint, stream)
+                        self.scheduler.update(token, response.headers, resource)
+                        body = await response.text() if response.status in (403, 429) else ""
+                        if not self.scheduler.throttled(token, response.status, response.headers, body, attempt):
+                            yield response
+                            return
+        raise GitHubRateLimited("GitHub API rate limit reached, please try again later",
+                                self.scheduler.backoff_base * 2 ** self.scheduler.max_retries)
+
+    def _record(self, response, endpoint: str, stream: bool = False):
+        github_requests.inc(endpoint=endpoint, status=response.status)
+        # Chunked responses carry no length and streamed ones may be cut off;
+        # whoever reads those bodies counts the bytes instead
+        if response.content_length and not stream:
+            github_bytes.inc(response.content_length, endpoint=endpoint)
+
+    def _ttl_cap(self, url: str, params: Optional[dict]) -> Optional[float]:
+        """The commits TTL for trees, files and listings read at a moving ref; None at a sha."""
+        if url.startswith(self.raw_url):
+            # {raw_url}/{owner}/{repo}/{ref}/{path}
+            parts = url[len(self.raw_url):].lstrip('/').split('/')
+            pinned = len(parts) > 2 and _COMMIT_SHA.match(parts[2])
+        elif self._endpoint(url) == "git":
+            pinned = _COMMIT_SHA.match(url.split('?')[0].rstrip('/').rsplit('/', 1)[-1])
+        elif self._endpoint(url) == "contents":
+            pinned = params and _COMMIT_SHA.match(str(params.get("ref", "")))
+        else:
+            # Commits, issues and the like have short TTLs of their own
+            return None
+        return None if pinned else self.cache.ttls.get("commits", DEFAULT_TTL)
+
+    def _endpoint(self, url: str) -> str:
+        if url.startswith(self.raw_url):
+            return "raw"
+        # {base_url}/repos/{owner}/{repo}/{endpoint}/...
+        parts = url[len(self.base_url):].split('?')[0].strip('/').split('/')
+        return parts[3] if len(parts) > 3 else parts[-1]
     
-    async def get_repo_contents(self, owner: str, repo: str, path: str = "") -> dict:
-        async with ClientSession() as session:
-            url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                return None
+    async def get_repo_contents(self, owner: str, repo: str, path: str = "", ref: Optional[str] = None) -> dict:
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{quote(path, safe='/')}"
+        async with self._get(url, params={"ref": ref} if ref else None) as response:
+            if response.status == 200:
+                return await response.json()
+            return None
     
     async def analyze_repo_structure(self, owner: str, repo: str) -> dict:
-        contents = await self.get_repo_contents(owner, repo)
+        # Concurrent requests for the same repo share one analysis; each caller
+        # gets its own top-level copy since endpoints add keys to it
+        analysis = await self.analysis_flight.do(
+            (owner.lower(), repo.lower()),
+            lambda: self._analyze_repo_structure(owner, repo)
+        )
+        return dict(analysis) if analysis else analysis
+
+    async def _analyze_repo_structure(self, owner: str, repo: str) -> dict:
+        # Seen this repo before: patch the stored snapshot with what changed since
+        snapshot = self.snapshots.get(f"{owner}/{repo}".lower()) if self.snapshots is not None else None
+        if snapshot is not None:
+            analysis = await self._analyze_incremental(owner, repo, snapshot)
+            if analysis is not None:
+                return analysis
+
+        if self.snapshot_api == "graphql":
+            return await self._analyze_repo_graphql(owner, repo)
+
+        # The listing and files are read at the commit the analysis reports, never at
+        # a moving HEAD, so cached copies can not be older than head_sha; issues
+        # do not depend on it and load meanwhile
+        listing, issues = await self._gather_bounded(
+            self._resolve_listing(owner, repo),
+            self.get_open_issues(owner, repo),
+        )
+        if isinstance(listing, Exception):
+            raise listing
+        commits, ref, tree, contents = listing
         if not contents:
             return None
             
-        analysis = {
+        analysis = self._new_analysis(owner, repo, tree)
+        if not isinstance(commits, Exception) and commits:
+            analysis["recent_commits"] = self._summarize_commits(commits)
+            analysis["head_sha"] = commits[0]["sha"]
+        analysis["open_issues"] = [] if isinstance(issues, Exception) else issues
+        
+        files_to_fetch = []
+        for item in contents:
+            analysis["file_structure"].append(item["name"])
+            kind = self._file_kind(item["name"], item.get("type", "file"))
+            if kind:
+                files_to_fetch.append((kind, item["name"], item.get("size")))
+
+        if tree is not None:
+            nested_env_files = [path for path in tree.env_files if '/' in path]
+            for path in nested_env_files[:MAX_NESTED_ENV_FILES]:
+                files_to_fetch.append(("env", path, tree.sizes.get(path)))
+
+        # Every interesting file is independent, so fetch them together; a
+        # failure only blanks the field it belongs to
+        file_contents = await self._gather_bounded(*(
+            self._fetch_for_analysis(kind, self._raw_file_url(owner, repo, path, ref), size)
+            for kind, path, size in files_to_fetch
+        ))
+
+        results = []
+        for (kind, path, _), result in zip(files_to_fetch, file_contents):
+            self._add_file_result(analysis, kind, path, result)
+            results.append((kind, path, result))
+        if not isinstance(commits, Exception):
+            root_types = {item["name"]: item.get("type", "file") for item in contents}
+            self._remember(owner, repo, analysis, root_types, results)
+            
+        return analysis
+
+    async def _resolve_listing(self, owner: str, repo: str):
+        """Recent commits, the ref they pin (head sha, or HEAD if unknown), the tree and root entries."""
+        try:
+            commits = await self._get_commits(owner, repo)
+        except Exception as e:
+            # A commits failure only blanks recent_commits
+            commits = e
+        ref = commits[0]["sha"] if not isinstance(commits, Exception) and commits else "HEAD"
+
+        # One recursive tree call sees nested files too; fall back to the root listing
+        tree = await self.get_repo_tree(owner, repo, ref) if self.use_tree else None
+        if tree is not None and not tree.truncated:
+            contents = [{"name": name, "type": kind, "size": size} for name, kind, size in tree.root]
+        else:
+            # A truncated tree can miss top-level entries; the contents listing never does
+            contents = await self.get_repo_contents(owner, repo, ref=ref)
+        return commits, ref, tree, contents
+
+    def _new_analysis(self, owner: str, repo: str, tree: Optional[RepoTree]) -> dict:
+        return {
             "has_readme": False,
             "readme_needs_update": False,
             "has_env": False,
             "exposed_secrets": [],
-            "package_info": None,
+            "manifests": {},
             "file_structure": [],
-            "recent_commits": await self.get_recent_commits(owner, repo),
-            "open_issues": await self.get_open_issues(owner, repo)
+            "recent_commits": [],
+            "open_issues": [],
+            "full_name": f"{owner}/{repo}",
+            "head_sha": None,
+            "tree": tree,
+            "tree_truncated": tree.truncated if tree is not None else False
         }
-        
-        for item in contents:
-            name = item["name"].lower()
-            if name == "readme.md":
-                analysis["has_readme"] = True
-                readme_content = await self._get_file_content(item["download_url"])
-                analysis["readme_content"] = readme_content
-                analysis["readme_needs_update"] = self._is_readme_incomplete(readme_content)
-            elif ".env" in name:
-                analysis["has_env"] = True
-                content = await self._get_file_content(item["download_url"])
-                analysis["exposed_secrets"].extend(self._find_secrets(content))
-            elif name in ["package.json", "requirements.txt", "pyproject.toml"]:
-                analysis["package_info"] = await self._get_file_content(item["download_url"])
-            
-            analysis["file_structure"].append(item["name"])
-            
+
+    def _file_kind(self, name: str, item_type: str = "file") -> Optional[str]:
+        if item_type != "file":
+            return None
+        name = name.lower()
+        if name == "readme.md":
+            return "readme"
+        if ".env" in name:
+            return "env"
+        if name in ["package.json", "requirements.txt", "pyproject.toml"]:
+            return "package"
+        return None
+
+    def _add_file_result(self, analysis: dict, kind: str, path: str, result):
+        failed = isinstance(result, Exception)
+        if kind == "readme":
+            check = ReadmeCheck() if failed else result
+            analysis["has_readme"] = True
+            analysis["readme_content"] = check.text
+            analysis["readme_needs_update"] = check.needs_update
+        elif kind == "env":
+            analysis["has_env"] = True
+            if not failed:
+                analysis["exposed_secrets"].extend(result)
+        elif kind == "package" and not failed:
+            # Keyed by file name: a repo can have a package.json and a requirements.txt
+            analysis["manifests"][path] = result
+
+    def _remember(self, owner: str, repo: str, analysis: dict, root_types: dict, results: list):
+        # Only complete analyses are worth patching later; a failed fetch means a hole
+        if self.snapshots is None or not analysis["head_sha"]:
+            return
+        if any(isinstance(result, Exception) for _, _, result in results):
+            return
+        tree = analysis["tree"]
+        self.snapshots.set(f"{owner}/{repo}".lower(), RepoSnapshot(
+            head_sha=analysis["head_sha"],
+            file_structure=list(analysis["file_structure"]),
+            root_types=root_types,
+            files={path: {"kind": kind, "result": self._stored_result(kind, result)}
+                   for kind, path, result in results},
+            recent_commits=analysis["recent_commits"],
+            tree=[[path, tree.sizes.get(path, 0)] for path in tree.paths]
+            if tree is not None and not tree.truncated else None,
+        ))
+
+    def _stored_result(self, kind: str, result):
+        if kind == "readme":
+            return {"text": result.text, "needs_update": result.needs_update}
+        # Secret findings or manifest text are JSON already
+        return result
+
+    def _add_stored_result(self, analysis: dict, kind: str, path: str, stored):
+        if kind == "readme":
+            analysis["has_readme"] = True
+            analysis["readme_content"] = stored["text"]
+            analysis["readme_needs_update"] = stored["needs_update"]
+        elif kind == "env":
+            analysis["has_env"] = True
+            analysis["exposed_secrets"].extend(stored)
+        elif kind == "package":
+            analysis["manifests"][path] = stored
+
+    async def _analyze_incremental(self, owner: str, repo: str, snapshot: RepoSnapshot) -> Optional[dict]:
+        """Bring a stored snapshot up to HEAD from the compare API.
+
+        Only README / .env / manifest files the diff touched are downloaded
+        again; the listing is patched from the diff's file statuses. Returns
+        None whenever a full analysis is the safer (or cheaper) answer.
+        """
+        # Comparing against HEAD tells us the new sha and the diff in one round trip
+        comparison, issues = await asyncio.gather(
+            self._compare(owner, repo, snapshot.head_sha, "HEAD"),
+            self.get_open_issues(owner, repo),
+            return_exceptions=True,
+        )
+        if isinstance(comparison, Exception) or comparison is None:
+            return None
+        changed, new_commits = comparison.get("files", []), comparison.get("commits", [])
+        head_sha = new_commits[-1]["sha"] if new_commits else snapshot.head_sha
+
+        sizes = dict(snapshot.tree) if snapshot.tree is not None else None
+        root_types = dict(snapshot.root_types)
+        files = dict(snapshot.files)
+        touched = []
+        for change in changed:
+            path, status = change["filename"], change["status"]
+            gone = [path] if status == "removed" else []
+            if status == "renamed":
+                gone.append(change.get("previous_filename", path))
+            for old in gone:
+                files.pop(old, None)
+                if '/' not in old:
+                    root_types.pop(old, None)
+                elif sizes is None:
+                    # Without the full tree we cannot tell whether its directory is now empty
+                    return None
+                if sizes is not None:
+                    sizes.pop(old, None)
+            if status == "removed":
+                continue
+            if sizes is not None:
+                # The compare API does not report sizes; the range cap still bounds the download
+                sizes[path] = sizes.get(path, 0)
+            if '/' not in path:
+                root_types[path] = "file"
+            else:
+                root_types.setdefault(path.split('/')[0], "dir")
+            touched.append(path)
+
+        if sizes is not None:
+            # A directory whose last file went away drops out of the listing
+            directories = {path.split('/')[0] for path in sizes if '/' in path}
+            root_types = {name: kind for name, kind in root_types.items()
+                          if kind != "dir" or name in directories}
+
+        nested_env = [path for path, entry in files.items() if '/' in path and entry["kind"] == "env"]
+        to_fetch = []
+        for path in touched:
+            if path in files:
+                kind = files[path]["kind"]
+            elif '/' not in path:
+                kind = self._file_kind(path)
+            elif sizes is not None and '.env' in path.rpartition('/')[2].lower() and (
+                    path in nested_env or len(nested_env) < MAX_NESTED_ENV_FILES):
+                kind = "env"
+                if path not in nested_env:
+                    nested_env.append(path)
+            else:
+                kind = None
+            if kind:
+                to_fetch.append((kind, path))
+            else:
+                files.pop(path, None)
+        fetched = await self._gather_bounded(*(
+            self._fetch_for_analysis(kind, self._raw_file_url(owner, repo, path, head_sha))
+            for kind, path in to_fetch
+        ))
+        if any(isinstance(result, Exception) for result in fetched):
+            return None
+        for (kind, path), result in zip(to_fetch, fetched):
+            files[path] = {"kind": kind, "result": self._stored_result(kind, result)}
+
+        # GitHub lists a tree byte-wise by name, directories as if they ended in "/"
+        root = sorted(root_types.items(), key=lambda item: item[0] + "/" if item[1] == "dir" else item[0])
+        tree = None
+        if sizes is not None:
+            tree = RepoTree(sizes, sizes=sizes,
+                            root=[(name, kind, sizes.get(name, 0)) for name, kind in root])
+        analysis = self._new_analysis(owner, repo, tree)
+        analysis["file_structure"] = [name for name, _ in root]
+        analysis["head_sha"] = head_sha
+        analysis["recent_commits"] = (self._summarize_commits(reversed(new_commits)) + snapshot.recent_commits)[:5]
+        analysis["open_issues"] = [] if isinstance(issues, Exception) else issues
+        # Same order as a full analysis: root files as listed, then nested .env files
+        for name, _ in root:
+            if name in files:
+                self._add_stored_result(analysis, files[name]["kind"], name, files[name]["result"])
+        for path in nested_env:
+            if path in files:
+                self._add_stored_result(analysis, "env", path, files[path]["result"])
+
+        self.snapshots.set(f"{owner}/{repo}".lower(), RepoSnapshot(
+            head_sha=head_sha,
+            file_structure=analysis["file_structure"],
+            root_types=dict(root),
+            files=files,
+            recent_commits=analysis["recent_commits"],
+            tree=[[path, size] for path, size in sizes.items()] if sizes is not None else None,
+        ))
+        return analysis
+
+    async def _compare(self, owner: str, repo: str, base: str, head: str) -> Optional[dict]:
+        url = f"{self.base_url}/repos/{owner}/{repo}/compare/{base}...{head}"
+        async with self._get(url) as response:
+            if response.status != 200:
+                return None
+            comparison = await response.json()
+        # Force pushes (diverged/behind), huge diffs and cut-off commit lists go the full way
+        if comparison.get("status") not in ("ahead", "identical"):
+            return None
+        if len(comparison.get("files", [])) >= MAX_COMPARE_FILES:
+            return None
+        if comparison.get("total_commits", 0) > len(comparison.get("commits", [])):
+            return None
+        return comparison
+
+    async def _analyze_repo_graphql(self, owner: str, repo: str) -> Optional[dict]:
+        """Same analysis from one GraphQL query: root entries, key file texts, commits, issues.
+
+        Only the root is listed (like the contents path), so nested .env files
+        are not scanned. Root files the query did not inline are fetched raw.
+        """
+        query, aliases = snapshot_query()
+        data = await self._graphql(query, {
+            "owner": owner, "name": repo, "commits": 5, "issues": 5,
+        })
+        repository = (data or {}).get("repository")
+        entries = ((repository or {}).get("root") or {}).get("entries")
+        if not entries:
+            return None
+
+        analysis = self._new_analysis(owner, repo, None)
+        target = (repository.get("defaultBranchRef") or {}).get("target") or {}
+        commits = (target.get("history") or {}).get("nodes") or []
+        analysis["recent_commits"] = [
+            {"message": c["message"], "author": (c.get("author") or {}).get("name")} for c in commits
+        ]
+        analysis["head_sha"] = target.get("oid")
+        analysis["open_issues"] = [
+            {"title": i["title"], "state": i["state"].lower()}
+            for i in (repository.get("issues") or {}).get("nodes") or []
+        ]
+
+        texts = {}
+        for alias, path in aliases.items():
+            blob = repository.get(alias)
+            if blob and not blob.get("isBinary") and not blob.get("isTruncated") and blob.get("text") is not None:
+                texts[path] = blob["text"]
+
+        results, files_to_fetch = [], []
+        for entry in entries:
+            analysis["file_structure"].append(entry["name"])
+            kind = self._file_kind(entry["name"], "file" if entry["type"] == "blob" else "dir")
+            if not kind:
+                continue
+            size = (entry.get("object") or {}).get("byteSize")
+            if entry["name"] in texts and (size is None or size <= settings.GITHUB_MAX_FILE_BYTES):
+                results.append((kind, entry["name"], self._read_text(kind, texts[entry["name"]])))
+            else:
+                # Not inlined, or over the cap: a ranged raw download reads just the prefix
+                files_to_fetch.append((kind, entry["name"], size))
+        fetched = await self._gather_bounded(*(
+            self._fetch_for_analysis(kind, self._raw_file_url(owner, repo, path, analysis["head_sha"] or "HEAD"), size)
+            for kind, path, size in files_to_fetch
+        ))
+        results.extend((kind, path, result) for (kind, path, _), result in zip(files_to_fetch, fetched))
+
+        for kind, path, result in results:
+            self._add_file_result(analysis, kind, path, result)
+        root_types = {entry["name"]: "file" if entry["type"] == "blob" else "dir" for entry in entries}
+        self._remember(owner, repo, analysis, root_types, results)
         return analysis
+
+    def _read_text(self, kind: str, text: str):
+        # What _fetch_for_analysis returns, for a file we already have in hand
+        if kind == "readme":
+            check = ReadmeCheck(keep_chars=settings.GITHUB_README_KEEP_CHARS)
+            check.feed(text)
+            return check
+        if kind == "env":
+            return self.secret_scanner.scan(text)
+        return text
+
+    async def _graphql(self, query: str, variables: dict) -> Optional[dict]:
+        url = f"{self.base_url}/graphql"
+        async with self._request(url, {}, False, method="POST",
+                                 json={"query": query, "variables": variables}) as response:
+            if response.status != 200:
+                return None
+            payload = await response.json()
+        if is_graphql_rate_limited(payload.get("errors")):
+            raise GitHubRateLimited("GitHub API rate limit reached, please try again later",
+                                    self.scheduler.backoff_base)
+        # A missing repo comes back as 200 with a NOT_FOUND error and repository: null
+        return payload.get("data")
+
+    async def list_owner_repos(self, owner: str, limit: Optional[int] = None) -> Optional[List[str]]:
+        """Full names of an org's (or, failing that, a user's) repos, following pagination."""
+        names = await self._list_repos(f"{self.base_url}/orgs/{owner}/repos", {"type": "public"}, limit)
+        if names is None:
+            names = await self._list_repos(f"{self.base_url}/users/{owner}/repos", {"type": "owner"}, limit)
+        return names
+
+    async def _list_repos(self, url: str, params: dict, limit: Optional[int]) -> Optional[List[str]]:
+        names = []
+        params = {**params, "per_page": 100}
+        while url and (limit is None or len(names) < limit):
+            async with self._get(url, params=params) as response:
+                if response.status != 200:
+                    # Unknown owner on the first page; a later page failing keeps what we have
+                    return names or None
+                names.extend(repo["full_name"] for repo in await response.json())
+                url = _next_page(response.headers.get("Link", ""))
+            # The next-page link already carries the query string
+            params = None
+        return names[:limit] if limit is not None else names
+
+    async def get_repo_tree(self, owner: str, repo: str, ref: str = "HEAD") -> Optional[RepoTree]:
+        url = f"{self.base_url}/repos/{owner}/{repo}/git/trees/{ref}"
+        async with self._get(url, params={"recursive": "1"}) as response:
+            if response.status == 200:
+                # GitHub cuts very large trees off (truncated=true); the partial
+                # tree still feeds the nested-file heuristics
+                return RepoTree.from_github(await response.json())
+            return None
+
+    def _raw_file_url(self, owner: str, repo: str, path: str, ref: str = "HEAD") -> str:
+        # Tree paths are raw: '#' or '?' in a file name would otherwise end the path
+        return f"{self.raw_url}/{owner}/{repo}/{quote(ref, safe='/')}/{quote(path, safe='/')}"
+
+    async def _gather_bounded(self, *coros) -> list:
+        semaphore = asyncio.Semaphore(self.fanout_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(bounded(coro) for coro in coros), return_exceptions=True)
     
-    async def _get_file_content(self, url: str) -> str:
-        async with ClientSession() as session:
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    if 'raw.githubusercontent.com' in url:
-                        return await response.text()
-                    data = await response.json()
-                    if isinstance(data, dict) and "content" in data:
-                        return base64.b64decode(data["content"]).decode('utf-8')
-                    return str(data)
-                return ""
+    async def _fetch_for_analysis(self, kind: str, url: str, size: Optional[int] = None):
+        # Files are consumed as they stream in rather than buffered whole
+        if kind == "readme":
+            return await self._stream_file(url, ReadmeCheck(keep_chars=settings.GITHUB_README_KEEP_CHARS), size)
+        if kind == "env":
+            return (await self._stream_file(url, self.secret_scanner.stream(), size)).findings
+        return (await self._stream_file(url, TextCollector(), size)).text
+
+    async def _stream_file(self, url: str, consumer, size: Optional[int] = None):
+        """Feed a file to ``consumer.feed()`` in line-aligned text blocks.
+
+        At most GITHUB_MAX_FILE_BYTES are read. When the listing already says
+        the file is bigger, only that prefix is requested (Range); otherwise
+        the download is cut off once the cap is reached.
+        """
+        max_bytes = settings.GITHUB_MAX_FILE_BYTES
+        headers = {}
+        if url.startswith(self.raw_url) and size is not None and size > max_bytes:
+            headers["Range"] = f"bytes=0-{max_bytes - 1}"
+        async with self._get(url, headers=headers, stream=True) as response:
+            if response.status not in (200, 206):
+                return consumer
+            # Cached bodies were counted when they were downloaded
+            downloaded = not isinstance(response, CachedResponse)
+            if not url.startswith(self.raw_url):
+                # Contents API: base64 inside JSON, which GitHub only serves up to 1 MB
+                body = await response.read()
+                if downloaded:
+                    github_bytes.inc(len(body), endpoint=self._endpoint(url))
+                consumer.feed(self._decode_contents(json.loads(body))[:max_bytes])
+                return consumer
+            chunker = LineChunker()
+            received = read = 0
+            async for data in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                read += len(data)
+                data = data[:max_bytes - received]
+                received += len(data)
+                text = chunker.feed(data)
+                if text:
+                    consumer.feed(text)
+                if received >= max_bytes:
+                    # Leaving early closes the connection instead of draining the rest
+                    github_truncated_downloads.inc()
+                    break
+            if downloaded:
+                github_bytes.inc(read, endpoint="raw")
+            consumer.feed(chunker.flush())
+            return consumer
+
+    def _decode_contents(self, data) -> str:
+        if isinstance(data, dict) and "content" in data:
+            return base64.b64decode(data["content"]).decode('utf-8')
+        return str(data)
+
+    async def _get_file_content(self, url: str, size: Optional[int] = None) -> str:
+        return (await self._stream_file(url, TextCollector(), size)).text
     
     def _find_secrets(self, content: str) -> list:
-        secret_patterns = [
-            r"(?i)(api[_-]key|apikey|secret|password|token)[\w\d_-]*[\s]*[=:]\s*[\'\"]([^\'\"]*)[\'\"]",
-            r"(?i)aws[_-]access[_-]key[_-]id[\s]*[=:]\s*[\'\"]([^\'\"]*)[\'\"]",
-        ]
-        found_secrets = []
-        for pattern in secret_patterns:
-            matches = re.finditer(pattern, content)
-            found_secrets.extend(m.group(0) for m in matches)
-        return found_secrets
+        return self.secret_scanner.scan(content)
     
     def _is_readme_incomplete(self, content: str) -> bool:
-        if not content or len(content.strip()) < 50:
-            return True
-            
-        # Check for default/template READMEs
-        default_patterns = [
-            r"# Getting Started with Create React App",
-            r"This is a \[Next\.js\] project bootstrapped",
-            r"This README would normally document whatever steps",
-            r"<\?php\s+namespace\s+",
-            r"# Getting Started with \[.*\]",
-            r"# Default README"
-        ]
-        
-        for pattern in default_patterns:
-            if re.search(pattern, content):
-                return True
-                
-        # Check for minimal content
-        required_sections = [
-            r"#.*installation|setup|getting started",
-            r"#.*usage|features|functionality",
-            r"#.*configuration|env|environment",
-            r"#.*prerequisites|requirements",
-        ]
-        
-        found_sections = 0
-        for pattern in required_sections:
-            if re.search(pattern, content, re.I):
-                found_sections += 1
-                
-        return found_sections < 2  # README needs update if less than 2 key sections found
+        check = ReadmeCheck()
+        check.feed(content or "")
+        return check.needs_update
     
     async def get_recent_commits(self, owner: str, repo: str, limit: int = 5) -> list:
-        async with ClientSession() as session:
-            url = f"{self.base_url}/repos/{owner}/{repo}/commits"
-            async with session.get(url, headers=self.headers, params={"per_page": limit}) as response:
-                if response.status == 200:
-                    commits = await response.json()
-                    return [{"message": c["commit"]["message"], "author": c["commit"]["author"]["name"]} for c in commits]
-                return []
+        return self._summarize_commits(await self._get_commits(owner, repo, limit))
+
+    async def _get_commits(self, owner: str, repo: str, limit: int = 5) -> list:
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+        async with self._get(url, params={"per_page": limit}) as response:
+            if response.status == 200:
+                return await response.json()
+            return []
+
+    def _summarize_commits(self, commits: list) -> list:
+        return [{"message": c["commit"]["message"], "author": c["commit"]["author"]["name"]} for c in commits]
     
     async def get_open_issues(self, owner: str, repo: str, limit: int = 5) -> list:
-        async with ClientSession() as session:
-            url = f"{self.base_url}/repos/{owner}/{repo}/issues"
-            async with session.get(url, headers=self.headers, params={"state": "open", "per_page": limit}) as response:
-                if response.status == 200:
-                    issues = await response.json()
-                    return [{"title": i["title"], "state": i["state"]} for i in issues]
-                return []
-
-# Create and export an instance
-github_service = GitHubService(settings.GITHUB_TOKEN)
\ No newline at end of file
+        url = f"{self.base_url}/repos/{owner}/{repo}/issues"
+        async with self._get(url, low_priority=True, params={"state": "open", "per_page": limit}) as response:
+            if response.status == 200:
+                issues = await response.json()
+                return [{"title": i["title"], "state": i["state"]} for i in issues]
+            return []
@@ -0,0 +1,50 @@
+from typing import Dict, Tuple
+
+# Root files whose text is requested inline. Anything else the analysis wants
+# (say, .env.staging) is downloaded afterwards like in the REST path.
+SNAPSHOT_FILES = (
+    "README.md",
+    "readme.md",
+    "Readme.md",
+    "package.json",
+    "requirements.txt",
+    "pyproject.toml",
+    ".env",
+    ".env.local",
+    ".env.development",
+    ".env.production",
+    ".env.example",
+)
+
+_QUERY = """query Snapshot($owner: String!, $name: String!, $commits: Int!, $issues: Int!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          oid
+          history(first: $commits) { nodes { oid message author { name } } }
+        }
+      }
+    }
+    issues(first: $issues, states: OPEN, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { title state }
+    }
+    root: object(expression: "HEAD:") {
+      ... on Tree { entries { name type object { ... on Blob { byteSize } } } }
+    }
+%s
+  }
+}"""
+
+_FILE_FIELD = '    file%d: object(expression: "HEAD:%s") { ... on Blob { text isBinary isTruncated } }'
+
+
+def snapshot_query(files: Tuple[str, ...] = SNAPSHOT_FILES) -> Tuple[str, Dict[str, str]]:
+    """The snapshot query and the alias -> path map for its inline file texts."""
+    aliases = {f"file{i}": path for i, path in enumerate(files)}
+    fields = "\n".join(_FILE_FIELD % (i, path) for i, path in enumerate(files))
+    return _QUERY % fields, aliases
+
+
+def is_rate_limited(errors: list) -> bool:
+    return any(error.get("type") == "RATE_LIMITED" for error in errors or [])
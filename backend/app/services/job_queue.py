@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when the backlog is at its configured depth."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None
+    # Milliseconds per pipeline stage, plus "queued" (time waiting for a worker)
+    timings: Dict[str, float] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MemoryJobStore:
+    """Jobs for the lifetime of the process, oldest finished ones dropped first."""
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def save(self, job: Job):
+        self._jobs[job.id] = job
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [j.id for j in self._jobs.values() if j.finished][:len(self._jobs) - self.max_jobs]:
+                del self._jobs[job_id]
+
+    def pending(self) -> List[Job]:
+        return []
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore:
+    """Jobs on disk, so queued and interrupted jobs are picked up again after a restart."""
+
+    def __init__(self, path: str, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+        self._db.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def save(self, job: Job):
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+            (job.id, job.status, job.created_at, json.dumps(job.to_dict())),
+        )
+        self._db.execute(
+            """DELETE FROM jobs WHERE status IN (?, ?) AND id IN (
+                SELECT id FROM jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (DONE, FAILED, self.max_jobs),
+        )
+        self._db.commit()
+
+    def pending(self) -> List[Job]:
+        rows = self._db.execute(
+            "SELECT data FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+        ).fetchall()
+        return [Job(**json.loads(data)) for data, in rows]
+
+    def close(self):
+        self._db.close()
+
+
+def create_job_store(backend: str, path: str, max_jobs: int):
+    if backend == "sqlite":
+        return SQLiteJobStore(path, max_jobs)
+    return MemoryJobStore(max_jobs)
+
+
+class JobQueue:
+    """In-process queue drained by a fixed pool of worker tasks.
+
+    The handler receives the Job and returns a JSON-serializable result;
+    it can time its stages with ``job.stage(name)``. Failures are recorded
+    through ``describe_error`` so pollers get a status code and detail.
+    """
+
+    def __init__(self, store, workers: int, max_depth: int):
+        self.store = store
+        self.workers = workers
+        self.max_depth = max_depth
+        self.rejected = 0
+        self._queue: "asyncio.Queue[Job]" = None
+        self._tasks: List[asyncio.Task] = []
+        self._handler = None
+        self._describe_error = None
+        self._running = 0
+
+    async def start(self, handler: Callable[[Job], Awaitable[dict]],
+                    describe_error: Callable[[Exception], dict]):
+        self._handler = handler
+        self._describe_error = describe_error
+        self._queue = asyncio.Queue()
+        # Jobs a previous process accepted but never finished start over
+        for job in self.store.pending():
+            job.status = QUEUED
+            job.timings = {}
+            self.store.save(job)
+            self._queue.put_nowait(job)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, kind: str, payload: dict) -> Job:
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull(f"Job queue is full ({self.max_depth} waiting), try again shortly")
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload)
+        self.store.save(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run(job)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.timings["queued"] = round((job.started_at - job.created_at) * 1000, 1)
+        self.store.save(job)
+        try:
+            job.result = await self._handler(job)
+            job.status = DONE
+        except asyncio.CancelledError:
+            # Shutting down: leave the job "running" so a persistent store retries it
+            raise
+        except Exception as e:
+            job.error = self._describe_error(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        job.timings["total"] = round((job.finished_at - job.created_at) * 1000, 1)
+        self.store.save(job)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.depth,
+            "running": self._running,
+            "max_depth": self.max_depth,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,117 @@
+from contextlib import asynccontextmanager
+from typing import Any, Callable, List, Optional
+import asyncio
+import re
+import time
+
+
+KEYS_EXHAUSTED_MESSAGE = "All API keys have been exhausted. Please try again later."
+
+
+class KeysExhausted(RuntimeError):
+    pass
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "code", None) == 429 or "429" in str(error)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Best-effort cooldown hint from a 429: Retry-After header, RetryInfo or message."""
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = re.search(r"retry (?:in|after) ([\d.]+)\s*s", str(error), re.I)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class KeyState:
+    def __init__(self, index: int, api_key: str):
+        self.index = index
+        self.api_key = api_key
+        self.model = None
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+
+class ApiKeyPool:
+    """Hands out Gemini API keys per request instead of swapping a global key.
+
+    Every key gets its own model (and client), so a 429 on one key puts only
+    that key on cooldown; requests already running on other keys are not
+    affected. Leases go to the healthy key with the fewest requests in flight.
+    """
+
+    def __init__(self, api_keys: List[str], model_factory: Callable[[str], Any],
+                 default_cooldown: float, max_wait: float):
+        self.keys = [KeyState(i, key) for i, key in enumerate(api_keys)]
+        self.model_factory = model_factory
+        self.default_cooldown = default_cooldown
+        self.max_wait = max_wait
+
+    def use_model_factory(self, model_factory: Callable[[str], Any]):
+        self.model_factory = model_factory
+        for state in self.keys:
+            state.model = None
+
+    async def acquire(self) -> KeyState:
+        while True:
+            now = time.monotonic()
+            healthy = [state for state in self.keys if state.healthy(now)]
+            if healthy:
+                return min(healthy, key=lambda state: (state.in_flight, state.requests))
+            # Every key is cooling down: wait for the first one if that is soon enough
+            wait = min(state.cooldown_until for state in self.keys) - now
+            if wait > self.max_wait:
+                raise KeysExhausted(KEYS_EXHAUSTED_MESSAGE)
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def lease(self):
+        state = await self.acquire()
+        if state.model is None:
+            state.model = self.model_factory(state.api_key)
+        state.in_flight += 1
+        state.requests += 1
+        try:
+            yield state
+        finally:
+            state.in_flight -= 1
+
+    def mark_rate_limited(self, state: KeyState, error: Exception):
+        cooldown = retry_after_seconds(error)
+        state.rate_limited += 1
+        state.cooldown_until = time.monotonic() + (cooldown if cooldown is not None else self.default_cooldown)
+
+    def mark_failed(self, state: KeyState):
+        state.failures += 1
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                "key": f"...{state.api_key[-4:]}",
+                "in_flight": state.in_flight,
+                "requests": state.requests,
+                "rate_limited": state.rate_limited,
+                "failures": state.failures,
+                "cooldown_remaining": round(max(0.0, state.cooldown_until - now), 3),
+            }
+            for state in self.keys
+        ]
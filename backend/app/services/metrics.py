@@ -0,0 +1,183 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans recorded while handling the current HTTP request, for Server-Timing.
+# Tasks spawned by the request (fan-out) copy the context and append to the same list.
+request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(labelnames, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        self._values[tuple(str(labels[name]) for name in self.labelnames)] += amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, values)} {total:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(tuple(str(labels[name]) for name in self.labelnames), ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _label_text(self.labelnames + ("le",), values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {self._sums[values]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Sampled when /metrics is scraped; ``collect`` returns {label values: value}."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for values, value in sorted(self.collect().items()):
+            if value is not None:
+                lines.append(f"{self.name}{_label_text(self.labelnames, values)} {value:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry; everything lives in this process."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...], collect) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, collect))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "codecritic_stage_seconds", "Time spent per pipeline stage", ("stage",)
+)
+http_request_seconds = metrics.histogram(
+    "codecritic_http_request_seconds", "HTTP request latency", ("route", "status")
+)
+github_requests = metrics.counter(
+    "codecritic_github_requests_total", "Requests sent to GitHub", ("endpoint", "status")
+)
+github_bytes = metrics.counter(
+    "codecritic_github_bytes_total", "Response bytes downloaded from GitHub", ("endpoint",)
+)
+github_truncated_downloads = metrics.counter(
+    "codecritic_github_truncated_downloads_total", "File downloads cut off at GITHUB_MAX_FILE_BYTES"
+)
+cache_events = metrics.counter(
+    "codecritic_cache_events_total", "Cache lookups by outcome", ("cache", "event")
+)
+gemini_requests = metrics.counter(
+    "codecritic_gemini_requests_total", "Gemini generation calls by outcome", ("kind", "outcome")
+)
+gemini_key_rotations = metrics.counter(
+    "codecritic_gemini_key_rotations_total", "Retries moved to another API key after a 429"
+)
+prompt_tokens = metrics.counter(
+    "codecritic_prompt_tokens_total", "Estimated prompt tokens sent to Gemini", ("kind",)
+)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the stage histogram and the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=stage)
+        spans = request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Server-Timing value with one entry per stage; repeated stages are summed."""
+    totals: Dict[str, List[float]] = {}
+    for stage, elapsed in spans:
+        total = totals.setdefault(stage, [0.0, 0])
+        total[0] += elapsed
+        total[1] += 1
+    entries = []
+    for stage, (elapsed, calls) in totals.items():
+        entry = f"{stage.replace('.', '-')};dur={elapsed * 1000:.1f}"
+        if calls > 1:
+            entry += f';desc="{calls} calls"'
+        entries.append(entry)
+    return ", ".join(entries)
@@ -0,0 +1,164 @@
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Sequence, Tuple
+import math
+
+from .fingerprint import fingerprint_manifest
+
+
+class TokenEstimator:
+    """Cheap local token count: characters divided by an average chars-per-token.
+
+    The ratio starts at a typical value for English/code and can be
+    calibrated against the model's own count_tokens results.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self.calibrations = 0
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def chars_for(self, tokens: int) -> int:
+        return max(0, int(tokens * self.chars_per_token))
+
+    def calibrate(self, text: str, actual_tokens: int):
+        if not text or actual_tokens <= 0:
+            return
+        observed = len(text) / actual_tokens
+        # Running average so a single odd prompt does not swing the ratio
+        self.calibrations += 1
+        self.chars_per_token += (observed - self.chars_per_token) / self.calibrations
+
+
+class PromptSection:
+    """A variable-size part of a prompt.
+
+    ``shrink(max_chars)`` renders the section in at most ``max_chars``
+    characters; it is only called when the full ``text`` does not fit.
+    ``weight`` sets the section's share of the budget when space is tight.
+    """
+
+    def __init__(self, name: str, text: str, shrink: Callable[[int], str], weight: float = 1.0):
+        self.name = name
+        self.text = text
+        self.shrink = shrink
+        self.weight = weight
+
+
+def fit_sections(sections: Sequence[PromptSection], budget_tokens: int,
+                 estimator: TokenEstimator) -> Tuple[Dict[str, str], List[str]]:
+    """Render sections so their estimated total stays within ``budget_tokens``.
+
+    Space is water-filled by weight: sections that need less than their
+    share keep their full text and the leftover goes to the rest, which are
+    shrunk to what they were allotted. Returns rendered texts and the names
+    of the sections that were shrunk.
+    """
+    needs = {section.name: estimator.count(section.text) for section in sections}
+    rendered: Dict[str, str] = OrderedDict((section.name, section.text) for section in sections)
+    if sum(needs.values()) <= budget_tokens:
+        return rendered, []
+
+    remaining = max(0, budget_tokens)
+    total_weight = sum(section.weight for section in sections)
+    truncated = []
+    for section in sorted(sections, key=lambda s: needs[s.name] / s.weight):
+        share = remaining * section.weight / total_weight if total_weight else 0
+        if needs[section.name] <= share:
+            remaining -= needs[section.name]
+        else:
+            rendered[section.name] = section.shrink(estimator.chars_for(int(share)))
+            remaining -= estimator.count(rendered[section.name])
+            truncated.append(section.name)
+        total_weight -= section.weight
+    return rendered, truncated
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    note = f" [... {len(text) - max_chars} more characters]"
+    return text[:max(0, max_chars - len(note))] + note
+
+
+def readme_outline(text: str, max_chars: int) -> str:
+    """Keep every heading and the first line under it, in order, then the rest of the text."""
+    if len(text) <= max_chars:
+        return text
+    lines = text.splitlines()
+    keep = set()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith('#'):
+            keep.add(i)
+            for j in range(i + 1, min(i + 4, len(lines))):
+                if lines[j].strip() and not lines[j].lstrip().startswith('#'):
+                    keep.add(j)
+                    break
+    # Headings first, then fill the remaining space with body lines in order
+    limit = max_chars - 40  # room for the omitted-lines note
+    selected, used = set(), 0
+    for order in (sorted(keep), range(len(lines))):
+        for i in order:
+            if i in selected:
+                continue
+            cost = len(lines[i]) + 1
+            if used + cost > limit:
+                continue
+            selected.add(i)
+            used += cost
+    outline = "\n".join(lines[i] for i in sorted(selected))
+    dropped = len(lines) - len(selected)
+    return truncate_text(outline + (f"\n[... {dropped} README lines omitted]" if dropped else ""), max_chars)
+
+
+def sample_paths(paths: Sequence[str], max_chars: int, separator: str = ", ") -> str:
+    """Round-robin sample of paths across top-level directories."""
+    text = separator.join(paths)
+    if len(text) <= max_chars:
+        return text
+    groups: Dict[str, deque] = OrderedDict()
+    for path in paths:
+        groups.setdefault(path.split('/', 1)[0] if '/' in path else '', deque()).append(path)
+    limit = max_chars - 32  # room for the "... and N more" tail
+    picked, used = [], 0
+    queues = list(groups.values())
+    while queues:
+        progressed = False
+        for queue in queues:
+            path = queue.popleft()
+            cost = len(path) + len(separator)
+            if used + cost <= limit:
+                picked.append(path)
+                used += cost
+                progressed = True
+        queues = [queue for queue in queues if queue]
+        if not progressed:
+            break
+    return separator.join(picked + [f"... and {len(paths) - len(picked)} more"])
+
+
+def dependency_names(package_info: str) -> List[str]:
+    """Dependencies listed in a package.json, requirements.txt or pyproject.toml body."""
+    return fingerprint_manifest(package_info).manifest.requirements()
+
+
+def format_manifests(manifests: Dict[str, str]) -> str:
+    """Every manifest under its file name, in name order."""
+    if not manifests:
+        return "No dependencies found"
+    return "\n".join(f"{name}: {text}" for name, text in sorted(manifests.items()))
+
+
+def summarize_dependencies(manifests: Dict[str, str], max_chars: int) -> str:
+    text = format_manifests(manifests)
+    if len(text) <= max_chars or not manifests:
+        return truncate_text(text, max_chars)
+    # An even share per manifest, so a long package.json cannot crowd out requirements.txt
+    share = max_chars // len(manifests)
+    parts = []
+    for name, body in sorted(manifests.items()):
+        limit = share - len(name) - 3
+        names = dependency_names(body)
+        parts.append(f"{name}: " + (sample_paths(names, limit) if names else truncate_text(body, limit)))
+    return truncate_text("\n".join(parts), max_chars)
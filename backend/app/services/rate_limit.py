@@ -0,0 +1,201 @@
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import asyncio
+import random
+import time
+
+
+class GitHubRateLimited(RuntimeError):
+    """Every token is out of quota (or throttled) for longer than we are willing to wait."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class QuotaBucket:
+    """One X-RateLimit-Resource (core, graphql, search, ...) of a token."""
+
+    def __init__(self):
+        # Unknown until GitHub reports it on the first response
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.in_flight = 0
+
+
+class TokenState:
+    def __init__(self, index: int, token: str):
+        self.index = index
+        self.token = token
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        # GitHub meters REST (core) and GraphQL calls against separate quotas
+        self.buckets: Dict[str, QuotaBucket] = {}
+        # Secondary limits throttle the token as a whole
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+
+    def bucket(self, resource: str) -> QuotaBucket:
+        bucket = self.buckets.get(resource)
+        if bucket is None:
+            bucket = self.buckets[resource] = QuotaBucket()
+        return bucket
+
+    def available(self, now: float, resource: str = "core") -> Optional[int]:
+        """Calls this token can still make right now (None when unknown)."""
+        if self.blocked_until > now:
+            return 0
+        bucket = self.buckets.get(resource)
+        if bucket is None or bucket.remaining is None or bucket.reset_at <= now:
+            return None
+        return bucket.remaining - bucket.in_flight
+
+    def ready_at(self, now: float, resource: str = "core") -> float:
+        if self.blocked_until > now:
+            return self.blocked_until
+        bucket = self.buckets.get(resource)
+        return bucket.reset_at if bucket is not None else 0.0
+
+
+class RateLimitScheduler:
+    """Spreads GitHub API calls over a pool of tokens using the quota GitHub reports.
+
+    Every response updates its token from X-RateLimit-Limit/Remaining/Reset,
+    in the bucket named by X-RateLimit-Resource. Calls go to the token with
+    the most quota left in the bucket they are charged to; once a token is below
+    ``reserve`` it only serves high-priority calls, and when no token has
+    quota a call waits for the earliest reset (up to ``max_wait``) or raises
+    GitHubRateLimited. Secondary limits (403/429 with Retry-After or a
+    "rate limit" message) block the token and are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(self, tokens: List[str], reserve: int, max_wait: float,
+                 max_retries: int, backoff_base: float):
+        self.tokens = [TokenState(i, token) for i, token in enumerate(tokens or [""])]
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.waits = 0
+        self.retries = 0
+        self.rejected = 0
+
+    async def acquire(self, low_priority: bool = False, resource: str = "core") -> TokenState:
+        floor = self.reserve if low_priority else 0
+        while True:
+            now = time.time()
+            best, best_available = None, None
+            for state in self.tokens:
+                available = state.available(now, resource)
+                if available is not None and available <= floor:
+                    continue
+                # Unknown quota counts as plenty; ties go to the least busy token
+                rank = (float("inf") if available is None else available, -state.in_flight)
+                if best is None or rank > best_available:
+                    best, best_available = state, rank
+            if best is not None:
+                return best
+
+            wait = min(state.ready_at(now, resource) for state in self.tokens) - now
+            # Low-priority calls give way as soon as a token is only down to its reserve
+            in_reserve = low_priority and any(state.blocked_until <= now for state in self.tokens)
+            if in_reserve or wait > self.max_wait:
+                self.rejected += 1
+                raise GitHubRateLimited(
+                    "GitHub API rate limit reached, please try again later", max(0.0, wait)
+                )
+            self.waits += 1
+            # Jittered so callers parked on the same token don't all retry at once
+            await asyncio.sleep(max(0.0, wait) + random.uniform(0, self.backoff_base))
+
+    @asynccontextmanager
+    async def lease(self, low_priority: bool = False, resource: str = "core"):
+        state = await self.acquire(low_priority, resource)
+        bucket = state.bucket(resource)
+        state.in_flight += 1
+        bucket.in_flight += 1
+        state.requests += 1
+        try:
+            yield state
+        finally:
+            state.in_flight -= 1
+            bucket.in_flight -= 1
+
+    def update(self, state: TokenState, headers, resource: str = "core"):
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        if remaining is None:
+            # raw.githubusercontent.com and cached responses carry no quota
+            return
+        bucket = state.bucket(headers.get("X-RateLimit-Resource") or resource)
+        bucket.remaining = int(remaining)
+        limit = _header_number(headers, "X-RateLimit-Limit")
+        if limit is not None:
+            bucket.limit = int(limit)
+        reset = _header_number(headers, "X-RateLimit-Reset")
+        if reset is not None:
+            bucket.reset_at = reset
+
+    def throttled(self, state: TokenState, status: int, headers, body: str, attempt: int) -> bool:
+        """Record a rate-limit response; False when it is an ordinary error.
+
+        The token is taken out of rotation until its reset (primary limit)
+        or for Retry-After / a jittered exponential backoff (secondary
+        limit), so the retry goes to another token or waits in acquire().
+        """
+        if status not in (403, 429):
+            return False
+        retry_after = _header_number(headers, "Retry-After")
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        if retry_after is None and remaining != 0 and "rate limit" not in body.lower():
+            # A plain 403 (permissions, blocked repo) is not ours to retry
+            return False
+        state.throttled += 1
+        self.retries += 1
+        if remaining == 0 and retry_after is None:
+            # update() already parked the token until X-RateLimit-Reset
+            return True
+        delay = retry_after if retry_after is not None else self.backoff_base * 2 ** attempt
+        # Jitter so concurrent callers don't all come back at the same instant
+        delay += random.uniform(0, self.backoff_base * 2 ** attempt)
+        state.blocked_until = max(state.blocked_until, time.time() + delay)
+        return True
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "tokens": [
+                {
+                    "token": f"...{state.token[-4:]}" if state.token else None,
+                    "resources": {
+                        resource: {
+                            "limit": bucket.limit,
+                            "remaining": bucket.remaining,
+                            "reset_in": (round(max(0.0, bucket.reset_at - now), 1)
+                                         if bucket.remaining is not None else None),
+                        }
+                        for resource, bucket in state.buckets.items()
+                    },
+                    "blocked_for": round(max(0.0, state.blocked_until - now), 1),
+                    "in_flight": state.in_flight,
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                }
+                for state in self.tokens
+            ],
+            "waits": self.waits,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import sys
+
+TEST_DIRECTORIES = {"test", "tests", "__tests__", "spec", "specs"}
+# test_app.py, conftest.py, app_test.go, user_spec.rb, App.test.tsx, app.spec.ts
+_TEST_FILE = re.compile(r"^(test_.+\.py|conftest\.py|.+_(test|spec)\.[a-z0-9]+|.+\.(test|spec)\.[a-z0-9]+)$")
+
+class RepoTree:
+    """Full repository file list with lookup indexes built in a single pass.
+
+    Paths are interned so the indexes share one copy of each string. The
+    project heuristics (tests, Docker, CI, env files) are evaluated once,
+    while or right after indexing, so asking for them later is O(1) instead
+    of a scan per check.
+    """
+
+    def __init__(self, paths: Iterable[str], sizes: Optional[Dict[str, int]] = None,
+                 root: Optional[List[Tuple[str, str, int]]] = None, truncated: bool = False):
+        self.paths: List[str] = []
+        self.sizes: Dict[str, int] = {}
+        self.truncated = truncated
+        self.by_extension: Dict[str, List[str]] = defaultdict(list)
+        self.by_basename: Dict[str, List[str]] = defaultdict(list)
+        self.directories = set()
+        self.env_files: List[str] = []
+        self.has_tests = False
+        self.has_docker = False
+        self.has_ci = False
+
+        for path in paths:
+            path = sys.intern(path)
+            self.paths.append(path)
+            if sizes and path in sizes:
+                self.sizes[path] = sizes[path]
+            lower = path.lower()
+            directory, _, name = lower.rpartition('/')
+            self.by_basename[name].append(path)
+            dot = name.rfind('.')
+            if dot > 0:
+                self.by_extension[name[dot:]].append(path)
+            while directory:
+                if directory in self.directories:
+                    break
+                self.directories.add(sys.intern(directory))
+                directory = directory.rpartition('/')[0]
+
+            if '.env' in name:
+                self.env_files.append(path)
+            if 'dockerfile' in name or 'docker-compose' in name:
+                self.has_docker = True
+            if lower.startswith('.github/workflows/'):
+                self.has_ci = True
+
+        # Unique directory and file names, not every path. A bare "tests" is a
+        # directory when only the root listing is known.
+        self.has_tests = (
+            any(directory.rpartition('/')[2] in TEST_DIRECTORIES for directory in self.directories)
+            or any(name in TEST_DIRECTORIES or _TEST_FILE.match(name) for name in self.by_basename)
+        )
+
+        # Top-level (name, type, size) entries, in the shape of a contents listing
+        self.root = root if root is not None else [(path, "file", self.sizes.get(path, 0))
+                                                   for path in self.paths if '/' not in path]
+
+    @classmethod
+    def from_github(cls, payload: dict) -> "RepoTree":
+        """Build from a ``GET /git/trees/{sha}?recursive=1`` response."""
+        paths, sizes, root = [], {}, []
+        for entry in payload.get("tree", []):
+            path, kind = entry["path"], entry["type"]
+            if '/' not in path and kind in ("blob", "tree"):
+                root.append((path, "file" if kind == "blob" else "dir", entry.get("size", 0)))
+            if kind == "blob":
+                paths.append(path)
+                sizes[path] = entry.get("size", 0)
+        return cls(paths, sizes=sizes, root=root, truncated=bool(payload.get("truncated")))
+
+    def has_extension(self, *extensions: str) -> bool:
+        return any(extension in self.by_extension for extension in extensions)
+
+    def __len__(self) -> int:
+        return len(self.paths)
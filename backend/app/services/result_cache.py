@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import time
+
+
+class ResultCache:
+    """In-process LRU of generated results with a time-to-live."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_seconds)`` or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, age
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def store(self, key: str, value: Any):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
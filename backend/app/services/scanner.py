@@ -0,0 +1,238 @@
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import codecs
+import re
+
+# Decoded text is handed to scanners in blocks that end on a line break, so a
+# match never straddles two blocks; a line longer than this is cut anyway
+MAX_PENDING_CHARS = 1024 * 1024
+
+
+class SecretRule:
+    """A secret format plus lowercase substrings any match must contain.
+
+    The keywords act as a prefilter: the rule regex only runs on lines
+    where one of them occurs.
+    """
+
+    def __init__(self, name: str, pattern: str, keywords: Sequence[str]):
+        self.name = name
+        self.regex = re.compile(pattern)
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+
+
+DEFAULT_SECRET_RULES = [
+    SecretRule(
+        "generic-assignment",
+        r"(?i)(api[_-]key|apikey|secret|password|token)[\w\d_-]*[\s]*[=:]\s*[\'\"]([^\'\"]*)[\'\"]",
+        ("api_key", "api-key", "apikey", "secret", "password", "token"),
+    ),
+    SecretRule(
+        "aws-access-key-id-assignment",
+        r"(?i)aws[_-]access[_-]key[_-]id[\s]*[=:]\s*[\'\"]([^\'\"]*)[\'\"]",
+        ("aws",),
+    ),
+    SecretRule("aws-access-key-id", r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", ("akia", "asia")),
+    SecretRule("github-token", r"\b(?:ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9]{36}\b", ("ghp_", "gho_", "ghu_", "ghs_", "ghr_")),
+    SecretRule("github-fine-grained-pat", r"\bgithub_pat_[A-Za-z0-9_]{22,255}\b", ("github_pat_",)),
+    SecretRule("stripe-key", r"\b(?:sk|rk)_(?:live|test)_[0-9a-zA-Z]{24,}\b", ("sk_live_", "sk_test_", "rk_live_", "rk_test_")),
+    SecretRule("google-api-key", r"\bAIza[0-9A-Za-z_\-]{35}\b", ("aiza",)),
+    SecretRule("slack-token", r"\bxox[abposr]-[0-9A-Za-z-]{10,}", ("xoxa-", "xoxb-", "xoxp-", "xoxo-", "xoxs-", "xoxr-")),
+    SecretRule("private-key", r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP )?PRIVATE KEY(?: BLOCK)?-----", ("private key",)),
+]
+
+
+class SecretScanner:
+    """Precompiled secret detection over a pluggable rule set."""
+
+    def __init__(self, rules: Optional[Sequence[SecretRule]] = None):
+        self.rules = list(DEFAULT_SECRET_RULES if rules is None else rules)
+        rules_by_keyword: Dict[str, Set[int]] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                rules_by_keyword.setdefault(keyword, set()).add(index)
+        self._keywords = sorted(rules_by_keyword.items())
+
+    def scan(self, text: str) -> List[str]:
+        """Return matched secrets in order, each reported once per line.
+
+        Keywords are located with plain substring search on the lowercased
+        text (much cheaper than case-insensitive regex scans), and only the
+        lines they land on are run through the rule regexes. Matches are
+        therefore line-scoped.
+        """
+        if not text:
+            return []
+        lower = text.lower()
+        if len(lower) != len(text):
+            # Lowercasing changed offsets (rare non-ASCII case); look line by line instead
+            return self._scan_lines(text, self._line_candidates(text))
+
+        candidates: Dict[int, Tuple[int, Set[int]]] = {}
+        for keyword, indexes in self._keywords:
+            pos = lower.find(keyword)
+            while pos != -1:
+                start = lower.rfind("\n", 0, pos) + 1
+                end = lower.find("\n", pos)
+                if end == -1:
+                    end = len(lower)
+                if start in candidates:
+                    candidates[start][1].update(indexes)
+                else:
+                    candidates[start] = (end, set(indexes))
+                pos = lower.find(keyword, end)
+        return self._scan_lines(text, candidates)
+
+    def _line_candidates(self, text: str) -> Dict[int, Tuple[int, Set[int]]]:
+        candidates: Dict[int, Tuple[int, Set[int]]] = {}
+        start = 0
+        for line in text.split("\n"):
+            lower = line.lower()
+            indexes = {index for keyword, rules in self._keywords if keyword in lower for index in rules}
+            if indexes:
+                candidates[start] = (start + len(line), indexes)
+            start += len(line) + 1
+        return candidates
+
+    def _scan_lines(self, text: str, candidates: Dict[int, Tuple[int, Set[int]]]) -> List[str]:
+        found = []
+        for start in sorted(candidates):
+            end, indexes = candidates[start]
+            spans = []
+            for index in sorted(indexes):
+                for match in self.rules[index].regex.finditer(text, start, end):
+                    # A token inside an already reported assignment is the same secret
+                    if any(s <= match.start() and match.end() <= e for s, e in spans):
+                        continue
+                    spans.append(match.span())
+                    found.append(match.group(0))
+        return found
+
+    def stream(self) -> "SecretScan":
+        return SecretScan(self)
+
+
+class SecretScan:
+    """Incremental scan: feed text blocks, read ``findings``."""
+
+    def __init__(self, scanner: SecretScanner):
+        self.scanner = scanner
+        self.findings: List[str] = []
+
+    def feed(self, text: str):
+        self.findings.extend(self.scanner.scan(text))
+
+
+TEMPLATE_README_PATTERNS = [
+    r"# Getting Started with Create React App",
+    r"This is a \[Next\.js\] project bootstrapped",
+    r"This README would normally document whatever steps",
+    r"<\?php\s+namespace\s+",
+    r"# Getting Started with \[.*\]",
+    r"# Default README",
+]
+
+REQUIRED_README_SECTIONS = [
+    r"#.*installation|setup|getting started",
+    r"#.*usage|features|functionality",
+    r"#.*configuration|env|environment",
+    r"#.*prerequisites|requirements",
+]
+
+
+class ReadmeCheck:
+    """Incremental README completeness check.
+
+    Needs an update when it is shorter than 50 non-blank characters, matches
+    a known template, or has fewer than 2 of the key sections. Only the first
+    ``keep_chars`` characters are retained as ``text``.
+    """
+
+    _template = re.compile("|".join(f"(?:{pattern})" for pattern in TEMPLATE_README_PATTERNS))
+    _sections = [re.compile(pattern, re.I) for pattern in REQUIRED_README_SECTIONS]
+
+    def __init__(self, keep_chars: Optional[int] = None):
+        self.keep_chars = keep_chars
+        self._parts: List[str] = []
+        self._kept = 0
+        self._length = 0
+        self._leading_blank = 0
+        self._trailing_blank = 0
+        self._seen_text = False
+        self.is_template = False
+        self.sections_found = set()
+
+    def feed(self, text: str):
+        if not text:
+            return
+        if self.keep_chars is None or self._kept < self.keep_chars:
+            part = text if self.keep_chars is None else text[:self.keep_chars - self._kept]
+            self._parts.append(part)
+            self._kept += len(part)
+
+        # Track len(content.strip()) without holding the content
+        self._length += len(text)
+        stripped = text.strip()
+        if not stripped:
+            if self._seen_text:
+                self._trailing_blank += len(text)
+            else:
+                self._leading_blank += len(text)
+        else:
+            if not self._seen_text:
+                self._leading_blank += len(text) - len(text.lstrip())
+                self._seen_text = True
+            self._trailing_blank = len(text) - len(text.rstrip())
+
+        if not self.is_template and self._template.search(text):
+            self.is_template = True
+        if len(self.sections_found) < 2:
+            for index, section in enumerate(self._sections):
+                if index not in self.sections_found and section.search(text):
+                    self.sections_found.add(index)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def stripped_length(self) -> int:
+        if not self._seen_text:
+            return 0
+        return self._length - self._leading_blank - self._trailing_blank
+
+    @property
+    def needs_update(self) -> bool:
+        if self.stripped_length < 50:
+            return True
+        if self.is_template:
+            return True
+        return len(self.sections_found) < 2  # README needs update if less than 2 key sections found
+
+
+class LineChunker:
+    """Decodes a UTF-8 byte stream into text blocks that end on a line break."""
+
+    def __init__(self, max_pending: int = MAX_PENDING_CHARS):
+        self.max_pending = max_pending
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, data: bytes) -> str:
+        text = self._pending + self._decoder.decode(data)
+        cut = text.rfind("\n")
+        if cut == -1:
+            if len(text) > self.max_pending:
+                self._pending = ""
+                return text
+            self._pending = text
+            return ""
+        self._pending = text[cut + 1:]
+        return text[:cut + 1]
+
+    def flush(self) -> str:
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return text
+
+
+default_secret_scanner = SecretScanner()
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+import json
+import sqlite3
+import time
+
+
+@dataclass
+class RepoSnapshot:
+    """What an analysis learned about a repo at one commit, in JSON-friendly form.
+
+    ``files`` maps each analyzed file (README, .env, manifest) to its kind
+    and result: ``{"text", "needs_update"}`` for a README, the secret
+    findings for an .env file, the text for a manifest. ``tree`` holds the
+    recursive listing as ``[path, size]`` pairs when the analysis had one.
+    """
+
+    head_sha: str
+    file_structure: List[str]
+    root_types: Dict[str, str]
+    files: Dict[str, Dict[str, Any]]
+    recent_commits: List[dict]
+    tree: Optional[List[list]] = None
+    stored_at: float = field(default_factory=time.time)
+
+
+class MemorySnapshotStore:
+    """In-process LRU bounded by entry count and total (JSON-encoded) size."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, RepoSnapshot]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[RepoSnapshot]:
+        snapshot = self._entries.get(key)
+        if snapshot is not None:
+            self._entries.move_to_end(key)
+        return snapshot
+
+    def set(self, key: str, snapshot: RepoSnapshot):
+        self.delete(key)
+        size = _estimated_size(snapshot)
+        self._entries[key] = snapshot
+        self._sizes[key] = size
+        self.total_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            old, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old)
+
+    def delete(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.total_bytes -= self._sizes.pop(key)
+
+    def close(self):
+        pass
+
+
+class SQLiteSnapshotStore:
+    """Snapshots on disk, so the first analysis after a restart can still be incremental."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS snapshots (
+                repo TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS snapshots_lru ON snapshots (last_access)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[RepoSnapshot]:
+        row = self._db.execute("SELECT data FROM snapshots WHERE repo = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE snapshots SET last_access = ? WHERE repo = ?", (time.time(), key))
+        self._db.commit()
+        return RepoSnapshot(**json.loads(row[0]))
+
+    def set(self, key: str, snapshot: RepoSnapshot):
+        self._db.execute(
+            "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+            (key, json.dumps(asdict(snapshot)), time.time()),
+        )
+        self._db.execute(
+            """DELETE FROM snapshots WHERE repo IN (
+                SELECT repo FROM snapshots ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def _estimated_size(snapshot: RepoSnapshot) -> int:
+    # File text and tree paths dominate; encoding only the small parts keeps
+    # this cheap next to asdict() on a large tree
+    size = len(json.dumps(snapshot.files)) + len(json.dumps(snapshot.recent_commits))
+    size += sum(len(name) for name in snapshot.file_structure)
+    size += sum(len(entry[0]) + 8 for entry in snapshot.tree or ())
+    return size
+
+
+def create_snapshot_store(backend: str, path: str, max_entries: int, max_bytes: int):
+    if backend == "sqlite":
+        return SQLiteSnapshotStore(path, max_entries)
+    if backend == "memory":
+        return MemorySnapshotStore(max_entries, max_bytes)
+    return None
@@ -0,0 +1,5 @@
+import os
+
+# Settings() requires these at import time; benchmarks never talk to the real APIs
+os.environ.setdefault("GITHUB_TOKEN", "benchmark-token")
+os.environ.setdefault("GEMINI_API_KEYS", "benchmark-key")
@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+import uvicorn
+
+os.environ.setdefault("GITHUB_CACHE_BACKEND", "none")
+from . import _env  # noqa: F401
+from app.main import app
+from app.services import get_ai_service, get_github_service
+
+
+def wire_fakes(fake_github, fake_model):
+    """Point the app's shared services at the local fakes."""
+    github_service = get_github_service()
+    github_service.base_url = fake_github.base_url
+    github_service.raw_url = fake_github.raw_url
+    get_ai_service().key_pool.use_model_factory(lambda api_key: fake_model)
+
+
+class AppServer:
+    """Runs the FastAPI app under uvicorn on a free local port."""
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=0, log_level="warning"))
+        self.host = host
+        self._task = None
+
+    async def start(self) -> str:
+        self._task = asyncio.ensure_future(self.server.serve())
+        while not self.server.started:
+            await asyncio.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}"
+
+    async def stop(self):
+        self.server.should_exit = True
+        await self._task
@@ -0,0 +1,83 @@
+"""Roasting a whole org: serial /analyze-repo calls vs one streamed /analyze-repos batch.
+
+The fake org has --repos repositories, one of which answers --slow-delay
+seconds late, plus a malformed URL that must fail inline.
+
+    cd backend && python -m benchmarks.batch_analysis --repos 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+from app.config import settings
+
+
+async def serial(session: ClientSession, app_url: str, repos: int) -> float:
+    started = time.perf_counter()
+    for i in range(repos):
+        body = {"repo_url": f"https://github.com/octo/repo-{i}", "cache": "bypass"}
+        async with session.post(f"{app_url}/analyze-repo", json=body) as response:
+            await response.read()
+    return time.perf_counter() - started
+
+
+async def batch(session: ClientSession, app_url: str) -> dict:
+    started = time.perf_counter()
+    body = {"org": "octo", "repo_urls": ["not-a-repo-url"], "cache": "bypass"}
+    lines = []
+    first = None
+    async with session.post(f"{app_url}/analyze-repos", json=body) as response:
+        assert response.status == 200, await response.text()
+        async for raw in response.content:
+            lines.append(json.loads(raw))
+            if first is None:
+                first = time.perf_counter() - started
+    order = [line["repo_url"] for line in lines if "repo_url" in line]
+    return {
+        "elapsed": time.perf_counter() - started,
+        "first": first,
+        "summary": lines[-1],
+        "inline_errors": [line["error"]["detail"] for line in lines if line.get("ok") is False],
+        "slow_position": order.index("https://github.com/octo/repo-0") + 1,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--gemini-delay", type=float, default=0.2)
+    parser.add_argument("--github-delay", type=float, default=0.02)
+    parser.add_argument("--slow-delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Every fake repo has the same files, so identical prompts must not be merged
+    settings.AI_COALESCE_ROASTS = False
+    fake_github = FakeGitHub(delay=args.github_delay, org_repos=args.repos,
+                             repo_delays={"repo-0": args.slow_delay})
+    await fake_github.start()
+    wire_fakes(fake_github, FakeModel(delay=args.gemini_delay))
+    server = AppServer()
+    app_url = await server.start()
+    try:
+        async with ClientSession() as session:
+            elapsed = await serial(session, app_url, args.repos)
+            print(f"serial /analyze-repo x{args.repos}: {elapsed:6.2f}s")
+            result = await batch(session, app_url)
+            summary = result["summary"]
+            print(f"/analyze-repos (concurrency {settings.BATCH_CONCURRENCY}): {result['elapsed']:6.2f}s, "
+                  f"first line after {result['first'] * 1000:.0f} ms, "
+                  f"{summary['succeeded']} ok / {summary['failed']} failed inline {result['inline_errors']}, "
+                  f"slow repo arrived {result['slow_position']} of {summary['total']}")
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
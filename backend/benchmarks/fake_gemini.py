@@ -0,0 +1,107 @@
+import asyncio
+import random
+import time
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    """Async-iterable like the SDK's streamed response, one chunk per word group."""
+
+    def __init__(self, chunks: list, chunk_delay: float):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield FakeResponse(chunk)
+
+
+class FakeTokenCount:
+    def __init__(self, total_tokens: int):
+        self.total_tokens = total_tokens
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like the HTTP 429s the real client raises."""
+
+    code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"429 Resource has been exhausted (retry after {retry_after:.2f}s)")
+        self.response = type("Response", (), {"headers": {"Retry-After": f"{retry_after:.3f}"}})()
+
+
+class FakeServerError(Exception):
+    code = 500
+
+    def __init__(self):
+        super().__init__("500 An internal error has occurred")
+
+
+class FakeModel:
+    """Drop-in for genai.GenerativeModel that sleeps instead of calling Gemini.
+
+    ``delay`` is the total generation time; streamed calls spread it evenly
+    over ``chunks`` pieces of the text.
+
+
+    ``delay_per_1k_tokens`` adds prompt-size dependent latency (estimated at
+    ~3.5 characters per token, which is also what count_tokens reports).
+
+    With ``rate_limit`` set, at most that many calls are accepted per
+    ``window`` seconds and the rest fail with a 429, like a per-key quota.
+    ``error_rate`` is the fraction of calls failing with a 500 (seeded).
+    """
+
+    def __init__(self, delay: float = 0.0, text: str = "Your code is a crime scene.", chunks: int = 8,
+                 rate_limit: int = 0, window: float = 1.0, delay_per_1k_tokens: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.delay = delay
+        self.delay_per_1k_tokens = delay_per_1k_tokens
+        self.text = text
+        self.chunks = chunks
+        self.rate_limit = rate_limit
+        self.window = window
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.rejected = 0
+        self.errors = 0
+        self._window_start = 0.0
+        self._window_calls = 0
+
+    def _check_quota(self):
+        if not self.rate_limit:
+            return
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start, self._window_calls = now, 0
+        if self._window_calls >= self.rate_limit:
+            self.rejected += 1
+            raise FakeRateLimitError(self._window_start + self.window - now)
+        self._window_calls += 1
+
+    async def count_tokens_async(self, prompt, **kwargs):
+        return FakeTokenCount(int(len(prompt) / 3.5))
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        self.calls += 1
+        self._check_quota()
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise FakeServerError()
+        if self.delay_per_1k_tokens:
+            await asyncio.sleep(len(prompt) / 3.5 / 1000 * self.delay_per_1k_tokens)
+        if stream:
+            size = max(1, -(-len(self.text) // self.chunks))
+            pieces = [self.text[i:i + size] for i in range(0, len(self.text), size)]
+            return FakeStream(pieces, self.delay / len(pieces))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return FakeResponse(self.text)
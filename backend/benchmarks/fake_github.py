@@ -0,0 +1,382 @@
+import asyncio
+import base64
+import hashlib
+import random
+import re
+import time
+from collections import Counter
+from aiohttp import web
+
+DEFAULT_FILES = {
+    "README.md": "# Demo\n\n## Installation\n\npip install demo\n\n## Usage\n\nRun it.\n",
+    ".env": 'API_KEY="not-a-real-key"\n',
+    "requirements.txt": "fastapi\naiohttp\n",
+    "main.py": "print('hello')\n",
+}
+
+
+LARGE_FILE_CHUNK = (b"## Section\n\nSome README text that goes on and on, " * 1000 + b"\n") * 16
+
+
+class FakeGitHub:
+    """Local stand-in for the GitHub REST API and raw.githubusercontent.com.
+
+    With ``quota`` set, every token (Authorization header) gets that many API
+    calls per ``quota_window`` seconds, reported in X-RateLimit-* headers and
+    answered with 403 once spent. REST and GraphQL calls are metered
+    separately (X-RateLimit-Resource core / graphql). ``secondary_limit`` caps concurrent calls
+    per token; the excess gets a 403 "secondary rate limit" with Retry-After.
+    Raw file downloads and 304s are free, as on GitHub. ``error_rate`` is
+    the fraction of API calls answered with a 500 (seeded, so runs repeat).
+    """
+
+    def __init__(self, files: dict = None, delay: float = 0.0, fail_routes: set = (),
+                 truncate_tree: bool = False, quota: int = 0, quota_window: float = 60.0,
+                 secondary_limit: int = 0, secondary_retry_after: float = 1.0,
+                 org_repos: int = 0, repo_delays: dict = None, large_files: dict = None,
+                 error_rate: float = 0.0, seed: int = 0):
+        # Keys are repo paths; nested ones ("api/.env") only show up in the tree
+        self.files = dict(DEFAULT_FILES if files is None else files)
+        self.delay = delay
+        self.fail_routes = set(fail_routes)
+        self.truncate_tree = truncate_tree
+        self.quota = quota
+        self.quota_window = quota_window
+        self.secondary_limit = secondary_limit
+        self.secondary_retry_after = secondary_retry_after
+        # Every org lists this many repos (paginated); repo_delays slows down single repos
+        self.org_repos = org_repos
+        self.repo_delays = dict(repo_delays or {})
+        # Repos that 404 (REST) or resolve to null (GraphQL)
+        self.missing_repos = set()
+        # Path -> size of generated files that are streamed rather than stored
+        self.large_files = dict(large_files or {})
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.errors = 0
+        self.bytes_served = 0
+        # Newest first; commit() pushes onto it and records which paths it touched
+        self.history = [(f"{i:040x}", f"fix stuff #{i}") for i in range(30)]
+        self.changes = {}
+        self.usage = {}
+        self.in_flight = Counter()
+        self.throttled = Counter()
+        self.calls = Counter()
+        self.not_modified = 0
+        self.peers = set()
+        self.base_url = None
+        self._runner = None
+
+    def sizes(self) -> dict:
+        sizes = {path: len(body.encode()) for path, body in self.files.items()}
+        sizes.update(self.large_files)
+        # Tree order: byte-wise by path, like GitHub
+        return dict(sorted(sizes.items()))
+
+    @property
+    def head_sha(self) -> str:
+        return self.history[0][0]
+
+    def commit(self, changes: dict, message: str = "update") -> str:
+        """Apply ``{path: new text, or None to delete}`` as a new HEAD commit."""
+        statuses = {}
+        for path, body in changes.items():
+            if body is None:
+                statuses[path] = "removed"
+                self.files.pop(path, None)
+            else:
+                statuses[path] = "modified" if path in self.files else "added"
+                self.files[path] = body
+        sha = hashlib.sha1(f"{len(self.history)}:{message}".encode()).hexdigest()
+        self.history.insert(0, (sha, message))
+        self.changes[sha] = statuses
+        return sha
+
+    def _root_entries(self) -> list:
+        # (name, is_dir, size), ordered like GitHub lists a tree
+        entries, directories = [], set()
+        for path, size in self.sizes().items():
+            if "/" in path:
+                directories.add(path.split("/")[0])
+            else:
+                entries.append((path, False, size))
+        entries.extend((name, True, 0) for name in directories)
+        return sorted(entries, key=lambda entry: entry[0] + "/" if entry[1] else entry[0])
+
+    @property
+    def raw_url(self) -> str:
+        return f"{self.base_url}/raw"
+
+    @property
+    def connections(self) -> int:
+        # Every new client connection gets its own ephemeral port, so distinct
+        # peers == TCP (and, against the real API, TLS) handshakes
+        return len(self.peers)
+
+    @property
+    def quota_used(self) -> int:
+        # GitHub does not charge conditional requests answered with 304
+        return sum(self.calls.values()) - self.not_modified
+
+    def reset(self):
+        self.usage.clear()
+        self.throttled.clear()
+        self.calls.clear()
+        self.not_modified = 0
+        self.errors = 0
+        self.peers.clear()
+
+    @web.middleware
+    async def _track(self, request, handler):
+        route = request.match_info.route.name
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.calls[route] += 1
+        if route == "raw" or not (self.quota or self.secondary_limit):
+            return await self._respond(request, handler, route)
+
+        token = request.headers.get("Authorization", "")
+        bucket = (token, "graphql" if route == "graphql" else "core")
+        now = time.time()
+        used, reset_at = self.usage.get(bucket, (0, 0.0))
+        if reset_at <= now:
+            used, reset_at = 0, now + self.quota_window
+        quota_headers = {}
+        if self.quota:
+            if used >= self.quota:
+                self.throttled["primary"] += 1
+                return web.json_response(
+                    {"message": "API rate limit exceeded"}, status=403,
+                    headers=self._quota_headers(bucket[1], 0, reset_at),
+                )
+            self.usage[bucket] = (used + 1, reset_at)
+            quota_headers = self._quota_headers(bucket[1], self.quota - used - 1, reset_at)
+        if self.secondary_limit and self.in_flight[token] >= self.secondary_limit:
+            self.throttled["secondary"] += 1
+            return web.json_response(
+                {"message": "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."},
+                status=403, headers={**quota_headers, "Retry-After": str(self.secondary_retry_after)},
+            )
+        self.in_flight[token] += 1
+        try:
+            response = await self._respond(request, handler, route)
+        finally:
+            self.in_flight[token] -= 1
+        if response.status == 304 and self.quota:
+            self.usage[bucket] = (self.usage[bucket][0] - 1, reset_at)
+            quota_headers = self._quota_headers(bucket[1], self.quota - self.usage[bucket][0], reset_at)
+        response.headers.update(quota_headers)
+        return response
+
+    def _quota_headers(self, resource: str, remaining: int, reset_at: float) -> dict:
+        return {
+            "X-RateLimit-Resource": resource,
+            "X-RateLimit-Limit": str(self.quota),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(reset_at) + 1),
+        }
+
+    async def _respond(self, request, handler, route):
+        delay = self.delay + self.repo_delays.get(request.match_info.get("repo"), 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if route in self.fail_routes or (route != "raw" and self.error_rate
+                                         and self._random.random() < self.error_rate):
+            self.errors += 1
+            return web.json_response({"message": "Server Error"}, status=500)
+        if request.match_info.get("repo") in self.missing_repos:
+            return web.json_response({"message": "Not Found"}, status=404)
+        response = await handler(request)
+        if response.status == 200 and getattr(response, "body", None) is not None:
+            etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+        return response
+
+    async def contents(self, request):
+        owner, repo = request.match_info["owner"], request.match_info["repo"]
+        listing = []
+        for name, is_dir, size in self._root_entries():
+            if is_dir:
+                listing.append({"name": name, "path": name, "type": "dir", "size": 0, "download_url": None})
+                continue
+            listing.append({
+                "name": name,
+                "path": name,
+                "type": "file",
+                "size": size,
+                "download_url": f"{self.raw_url}/{owner}/{repo}/HEAD/{name}",
+                "url": f"{self.base_url}/repos/{owner}/{repo}/contents/{name}",
+            })
+        return web.json_response(listing)
+
+    async def tree(self, request):
+        entries = []
+        directories = set()
+        for path, size in self.sizes().items():
+            parts = path.split("/")
+            for depth in range(1, len(parts)):
+                directories.add("/".join(parts[:depth]))
+            entries.append({"path": path, "type": "blob", "size": size})
+        entries.extend({"path": path, "type": "tree"} for path in directories)
+        entries.sort(key=lambda entry: entry["path"] + "/" if entry["type"] == "tree" else entry["path"])
+        if self.truncate_tree:
+            entries = entries[: len(entries) // 2]
+        return web.json_response({"sha": "f" * 40, "tree": entries, "truncated": self.truncate_tree})
+
+    async def content_file(self, request):
+        body = self.files.get(request.match_info["path"])
+        if body is None:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return web.json_response({
+            "name": request.match_info["path"],
+            "encoding": "base64",
+            "content": base64.b64encode(body.encode()).decode(),
+        })
+
+    async def raw(self, request):
+        path = request.match_info["path"]
+        if path in self.large_files:
+            return await self._stream_large(request, self.large_files[path])
+        body = self.files.get(path)
+        if body is None:
+            return web.Response(status=404, text="404: Not Found")
+        return web.Response(text=body)
+
+    async def _stream_large(self, request, size: int):
+        # Generated on the fly (honouring Range) so the fake never holds the file
+        start, end = 0, size - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", request.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else end, end)
+        length = end - start + 1
+        response = web.StreamResponse(status=206 if match else 200, headers={"Content-Length": str(length)})
+        await response.prepare(request)
+        try:
+            while length > 0:
+                piece = LARGE_FILE_CHUNK[:length]
+                await response.write(piece)
+                self.bytes_served += len(piece)
+                length -= len(piece)
+        except (ConnectionError, RuntimeError):
+            # The client stopped reading; that is the point of the byte cap
+            pass
+        return response
+
+    async def commits(self, request):
+        per_page = int(request.query.get("per_page", 30))
+        return web.json_response([self._commit_json(sha, message) for sha, message in self.history[:per_page]])
+
+    def _commit_json(self, sha: str, message: str) -> dict:
+        return {"sha": sha, "commit": {"message": message, "author": {"name": "dev"}}}
+
+    async def compare(self, request):
+        base, _, head = request.match_info["basehead"].partition("...")
+        shas = [sha for sha, _ in self.history]
+        if base not in shas or head not in ("HEAD", self.head_sha):
+            return web.json_response({"message": "Not Found"}, status=404)
+        newer = self.history[:shas.index(base)]
+        # Net status per path over the range, oldest commit first
+        statuses = {}
+        for sha, _ in reversed(newer):
+            for path, status in self.changes.get(sha, {}).items():
+                before = statuses.get(path)
+                if before == "added" and status == "removed":
+                    del statuses[path]
+                elif before == "added":
+                    continue
+                elif before == "removed" and status == "added":
+                    statuses[path] = "modified"
+                else:
+                    statuses[path] = status
+        return web.json_response({
+            "status": "ahead" if newer else "identical",
+            "total_commits": len(newer),
+            "commits": [self._commit_json(sha, message) for sha, message in reversed(newer)],
+            "files": [{"filename": path, "status": status} for path, status in sorted(statuses.items())],
+        })
+
+    async def issues(self, request):
+        per_page = int(request.query.get("per_page", 30))
+        return web.json_response([
+            {"title": f"it is broken #{i}", "state": "open"} for i in range(per_page)
+        ])
+
+    async def org_repos_list(self, request):
+        org = request.match_info["org"]
+        if not self.org_repos:
+            return web.json_response({"message": "Not Found"}, status=404)
+        per_page = int(request.query.get("per_page", 30))
+        page = int(request.query.get("page", 1))
+        first = (page - 1) * per_page
+        repos = [{"full_name": f"{org}/repo-{i}"} for i in range(first, min(first + per_page, self.org_repos))]
+        headers = {}
+        if first + per_page < self.org_repos:
+            headers["Link"] = f'<{self.base_url}/orgs/{org}/repos?per_page={per_page}&page={page + 1}>; rel="next"'
+        return web.json_response(repos, headers=headers)
+
+    async def graphql(self, request):
+        # Understands just enough of the snapshot query: its aliased
+        # object(expression: "HEAD:path") fields, commits and issues
+        payload = await request.json()
+        variables = payload.get("variables", {})
+        if variables.get("name") in self.missing_repos:
+            return web.json_response({
+                "data": {"repository": None},
+                "errors": [{"type": "NOT_FOUND", "message": "Could not resolve to a Repository"}],
+            })
+        repository = {
+            "defaultBranchRef": {"target": {
+                "oid": self.head_sha,
+                "history": {"nodes": [
+                    {"oid": sha, "message": message, "author": {"name": "dev"}}
+                    for sha, message in self.history[:variables.get("commits", 5)]
+                ]},
+            }},
+            "issues": {"nodes": [
+                {"title": f"it is broken #{i}", "state": "OPEN"} for i in range(variables.get("issues", 5))
+            ]},
+        }
+        for alias, path in re.findall(r'(\w+): object\(expression: "HEAD:([^"]*)"\)', payload["query"]):
+            if path == "":
+                repository[alias] = {"entries": [
+                    {"name": name, "type": "tree", "object": {}} if is_dir
+                    else {"name": name, "type": "blob", "object": {"byteSize": size}}
+                    for name, is_dir, size in self._root_entries()
+                ]}
+            elif path in self.files:
+                repository[alias] = {"text": self.files[path], "isBinary": False, "isTruncated": False}
+            elif path in self.large_files:
+                repository[alias] = {"text": None, "isBinary": False, "isTruncated": True}
+            else:
+                repository[alias] = None
+        return web.json_response({"data": {"repository": repository}})
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._track])
+        app.router.add_get("/repos/{owner}/{repo}/contents/", self.contents, name="contents")
+        app.router.add_get("/repos/{owner}/{repo}/contents/{path:.+}", self.content_file, name="content_file")
+        app.router.add_get("/repos/{owner}/{repo}/git/trees/{ref}", self.tree, name="tree")
+        app.router.add_get("/repos/{owner}/{repo}/commits", self.commits, name="commits")
+        app.router.add_get("/repos/{owner}/{repo}/compare/{basehead}", self.compare, name="compare")
+        app.router.add_get("/repos/{owner}/{repo}/issues", self.issues, name="issues")
+        app.router.add_post("/graphql", self.graphql, name="graphql")
+        app.router.add_get("/orgs/{org}/repos", self.org_repos_list, name="org_repos")
+        app.router.add_get("/raw/{owner}/{repo}/{ref}/{path:.+}", self.raw, name="raw")
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,89 @@
+"""Project fingerprinting on large manifests and file lists.
+
+Compares the old detection (substring checks over the stringified manifest,
+repeated per framework) with the parsed rule-table match, cold and memoized,
+and times the whole README project analysis on big trees.
+
+    cd backend && python -m benchmarks.fingerprint --deps 5000 --files 100000
+"""
+import argparse
+import json
+import time
+
+from . import _env  # noqa: F401
+from app.services import fingerprint
+from app.services.ai_service import AIService
+from app.services.repo_tree import RepoTree
+
+
+def manifests(deps: int) -> dict:
+    npm = {f"package-{i}": f"^{i % 9}.0.0" for i in range(deps)}
+    npm["express"] = "^4.18.0"
+    python = [f"package-{i}>={i % 9}.0" for i in range(deps)] + ["fastapi>=0.100"]
+    return {
+        "package.json": json.dumps({"dependencies": npm, "devDependencies": {"typescript": "^5.0.0"},
+                                    "scripts": {"dev": "node index.js"}}),
+        "requirements.txt": "\n".join(python),
+        "pyproject.toml": "[project]\nname = \"demo\"\ndependencies = [\n"
+                          + "".join(f'  "{line}",\n' for line in python) + "]\n",
+    }
+
+
+def legacy_framework(text: str) -> dict:
+    # The string-scan detection this replaced, fed the parsed manifest
+    try:
+        package_json = json.loads(text)
+    except ValueError:
+        package_json = {}
+    if not isinstance(package_json, dict):
+        package_json = {}
+    for needle, name in (("next", "Next.js"), ("react", "React"), ("vue", "Vue"), ("express", "Express")):
+        if needle in str(package_json):
+            return {"name": name, "version": package_json.get("dependencies", {}).get(needle)}
+    return {"name": None, "version": None}
+
+
+def timed(fn, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return (time.perf_counter() - started) / runs * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deps", type=int, nargs="+", default=[100, 5000])
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for deps in args.deps:
+        for name, text in manifests(deps).items():
+            legacy_ms, legacy = timed(lambda: legacy_framework(text), args.runs)
+
+            def cold():
+                fingerprint._cache.clear()
+                return fingerprint.fingerprint_manifest(text)
+
+            cold_ms, result = timed(cold, args.runs)
+            warm_ms, _ = timed(lambda: fingerprint.fingerprint_manifest(text), args.runs)
+            print(f"{deps:>6} deps {name:>16}: string scan {legacy_ms:7.3f} ms -> {legacy['name']!s:>8} | "
+                  f"parsed {cold_ms:7.3f} ms, memoized {warm_ms:6.3f} ms -> {result.framework['name']} "
+                  f"({len(result.manifest.requirements())} deps)")
+
+    service = AIService()
+    package = manifests(max(args.deps))["package.json"]
+    for files in args.files:
+        paths = [f"src/pkg_{i % 50}/module_{i}.{('py', 'ts', 'tsx', 'go')[i % 4]}" for i in range(files)]
+        tree = RepoTree(paths)
+        for label, analysis in (
+            ("tree", {"tree": tree, "file_structure": [], "manifests": {"package.json": package}}),
+            ("root listing", {"file_structure": paths, "manifests": {"package.json": package}}),
+        ):
+            elapsed, info = timed(lambda: service._analyze_project_structure(analysis), args.runs)
+            print(f"{files:>7} files, {label:>12}: project analysis {elapsed:8.3f} ms "
+                  f"({info['framework']['name']}, {', '.join(info['languages'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Upstream calls and rate-limit quota spent on repeated analyses of one repo.
+
+    cd backend && python -m benchmarks.github_cache --repeats 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from . import _env  # noqa: F401
+from .fake_github import FakeGitHub
+from app.services.github_cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+from app.services.github_service import GitHubService
+
+
+async def run(fake: FakeGitHub, cache, repeats: int) -> dict:
+    fake.reset()
+    service = GitHubService("benchmark-token", base_url=fake.base_url, raw_url=fake.raw_url, cache=cache)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        assert await service.analyze_repo_structure("octo", "demo")
+    elapsed = time.perf_counter() - started
+    await service.close()
+    return {
+        "upstream_calls": sum(fake.calls.values()),
+        "quota_used": fake.quota_used,
+        "elapsed_s": elapsed,
+        "cache": cache.stats() if cache else None,
+    }
+
+
+def report(label: str, stats: dict):
+    line = (f"{label:>24}: {stats['upstream_calls']:4} calls, {stats['quota_used']:4} charged, "
+            f"{stats['elapsed_s'] * 1000:7.1f} ms")
+    if stats["cache"]:
+        line += "  " + ", ".join(f"{k}={v}" for k, v in stats["cache"].items())
+    print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.01, help="per-request server delay in seconds")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(delay=args.delay)
+    await fake.start()
+    expire_now = {endpoint: 0 for endpoint in ("contents", "git", "commits", "issues", "raw")}
+    try:
+        report("no cache", await run(fake, None, args.repeats))
+        report("memory, default TTLs", await run(fake, ResponseCache(MemoryCacheBackend(1024, 1 << 26)), args.repeats))
+        report("memory, always revalidate",
+               await run(fake, ResponseCache(MemoryCacheBackend(1024, 1 << 26), ttls=expire_now), args.repeats))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            cache = ResponseCache(SQLiteCacheBackend(path, 1024, 1 << 26), ttls=expire_now)
+            report("sqlite, always revalidate", await run(fake, cache, args.repeats))
+            cache.close()
+            # A fresh process reuses the validators persisted on disk
+            cache = ResponseCache(SQLiteCacheBackend(path, 1024, 1 << 26), ttls=expire_now)
+            report("sqlite, after restart", await run(fake, cache, args.repeats))
+            cache.close()
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
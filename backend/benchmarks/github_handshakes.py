@@ -0,0 +1,77 @@
+"""Count connection handshakes per /analyze-repo worth of GitHub calls.
+
+Compares the pooled GitHubService session against the old behaviour of
+opening a fresh ClientSession for every sub-request.
+
+    cd backend && python -m benchmarks.github_handshakes --requests 50
+"""
+import argparse
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from aiohttp import ClientSession
+
+from . import _env  # noqa: F401
+from .fake_github import FakeGitHub
+from app.services.github_service import GitHubService
+
+
+class PerCallSessionService(GitHubService):
+    # Pre-pooling behaviour: new session (and connection) for every call
+    @asynccontextmanager
+    async def _get(self, url: str, low_priority: bool = False, headers: Optional[dict] = None,
+                   stream: bool = False, **kwargs):
+        headers = {**self.headers, **self.scheduler.tokens[0].headers, **(headers or {})}
+        async with ClientSession() as session:
+            async with session.get(url, headers=headers, **kwargs) as response:
+                yield response
+
+
+async def run(service: GitHubService, fake: FakeGitHub, requests: int, concurrency: int) -> dict:
+    fake.reset()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            # Distinct repos so single-flight does not merge the requests
+            return await service.analyze_repo_structure("octo", f"demo-{i}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await service.close()
+    assert all(results), "analysis failed against the fake server"
+    return {
+        "upstream_calls": sum(fake.calls.values()),
+        "handshakes": fake.connections,
+        "handshakes_per_request": fake.connections / requests,
+        "elapsed_s": elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.0, help="per-request server delay in seconds")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(delay=args.delay)
+    base_url = await fake.start()
+    try:
+        for label, cls in (("per-call sessions", PerCallSessionService), ("pooled session", GitHubService)):
+            # No snapshots, so every request does the full set of calls
+            service = cls("benchmark-token", base_url=base_url, raw_url=fake.raw_url, snapshots=None)
+            stats = await run(service, fake, args.requests, args.concurrency)
+            print(
+                f"{label:>18}: {stats['upstream_calls']} calls, {stats['handshakes']} handshakes "
+                f"({stats['handshakes_per_request']:.2f}/request), {stats['elapsed_s'] * 1000:.1f} ms"
+            )
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Analyses against a fake GitHub that enforces per-token quotas and secondary limits.
+
+Shows how many analyses complete, how many are refused with a rate-limit
+error (instead of the old misleading "not found"), and how the calls are
+spread over a pool of 1..N tokens.
+
+    cd backend && python -m benchmarks.github_rate_limit --tokens 1 2 4 --quota 30
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from . import _env  # noqa: F401
+from .fake_github import FakeGitHub
+from app.config import settings
+from app.services.github_service import GitHubService
+from app.services.rate_limit import GitHubRateLimited
+
+
+async def run(fake: FakeGitHub, tokens: int, args) -> dict:
+    fake.reset()
+    names = [f"benchmark-token-{i}" for i in range(tokens)]
+    service = GitHubService(names[0], base_url=fake.base_url, raw_url=fake.raw_url, extra_tokens=names[1:])
+    outcomes = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def analyze(i: int):
+        async with semaphore:
+            try:
+                # Distinct repos so single-flight does not merge the load
+                analysis = await service.analyze_repo_structure("octo", f"demo-{i}")
+            except GitHubRateLimited:
+                outcomes["rate limited"] += 1
+                return
+            except Exception:
+                outcomes["error"] += 1
+                return
+            if analysis is None:
+                outcomes["not found"] += 1
+            elif analysis["open_issues"]:
+                outcomes["ok"] += 1
+            else:
+                outcomes["ok, issues skipped"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(analyze(i) for i in range(args.analyses)))
+    elapsed = time.perf_counter() - started
+    stats = service.scheduler.stats()
+    await service.close()
+    return {"outcomes": outcomes, "elapsed": elapsed, "stats": stats, "throttled": dict(fake.throttled)}
+
+
+def failures(result: dict) -> list:
+    # Refusing with GitHubRateLimited is fine; errors, "not found" and spending past the quota are not
+    problems = [f"{result['outcomes'][name]} {name}" for name in ("error", "not found") if result["outcomes"][name]]
+    if result["throttled"].get("primary"):
+        problems.append(f"{result['throttled']['primary']} primary-limit 403s")
+    return problems
+
+
+def report(label: str, result: dict):
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(result["outcomes"].items()))
+    per_token = " ".join(f"{t['requests']}/{t['resources'].get('core', {}).get('remaining')}"
+                         for t in result["stats"]["tokens"])
+    print(f"{label:>26}: {result['elapsed']:5.2f}s | {outcomes} | upstream 403s {result['throttled'] or '-'} | "
+          f"retries {result['stats']['retries']}, waits {result['stats']['waits']} | "
+          f"requests/remaining per token {per_token}")
+    for problem in failures(result):
+        print(f"  FAIL: {problem}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--analyses", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=30, help="API calls per token per window")
+    parser.add_argument("--window", type=float, default=3.0)
+    parser.add_argument("--secondary-limit", type=int, default=2, help="concurrent calls per token")
+    args = parser.parse_args()
+
+    settings.GITHUB_RATE_LIMIT_RESERVE = args.quota // 5
+    settings.GITHUB_RATE_LIMIT_MAX_WAIT = args.window + 1
+    settings.GITHUB_RATE_LIMIT_BACKOFF = 0.1
+
+    print(f"{args.analyses} analyses, 3 API calls each; quota {args.quota} calls / {args.window}s per token, "
+          f"reserve {settings.GITHUB_RATE_LIMIT_RESERVE}")
+    failed = False
+    fake = FakeGitHub(delay=0.02, quota=args.quota, quota_window=args.window)
+    await fake.start()
+    try:
+        for tokens in args.tokens:
+            result = await run(fake, tokens, args)
+            report(f"quota, {tokens} token(s)", result)
+            failed = failed or bool(failures(result))
+    finally:
+        await fake.stop()
+
+    print(f"secondary limit: {args.secondary_limit} concurrent calls per token, Retry-After 0.2s")
+    fake = FakeGitHub(delay=0.02, secondary_limit=args.secondary_limit, secondary_retry_after=0.2)
+    await fake.start()
+    try:
+        for tokens in args.tokens:
+            result = await run(fake, tokens, args)
+            report(f"secondary, {tokens} token(s)", result)
+            failed = failed or bool(failures(result))
+    finally:
+        await fake.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
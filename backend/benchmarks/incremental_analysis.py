@@ -0,0 +1,89 @@
+"""Re-analyzing a repo after a small commit: full analysis vs patching the last snapshot.
+
+Each step commits one change to the fake repo, then analyzes it with both
+services. The incremental result must match the full one field for field.
+The response cache is off so every analysis really goes to the fake.
+
+    cd backend && python -m benchmarks.incremental_analysis --files 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from . import _env  # noqa: F401
+from .fake_github import DEFAULT_FILES, FakeGitHub
+from app.services.github_service import GitHubService
+from app.services.snapshot_store import MemorySnapshotStore
+
+STEPS = [
+    ("no new commits", {}),
+    ("edit a source file", {"src/mod_7.py": "print('changed')\n"}),
+    ("edit the README", {"README.md": "# Demo\n\nTODO\n"}),
+    ("leak a nested .env", {"api/.env": 'AWS_SECRET_ACCESS_KEY="abcd1234abcd1234abcd1234abcd1234abcd1234"\n'}),
+    ("bump the manifest", {"package.json": '{"dependencies": {"react": "^19.0.0"}}'}),
+    ("delete the root .env", {".env": None}),
+    ("delete a whole directory", {"docs/guide.md": None}),
+]
+
+
+def comparable(analysis: dict) -> dict:
+    tree = analysis["tree"]
+    return {**analysis, "tree": sorted(tree.paths) if tree is not None else None}
+
+
+async def analyze(service: GitHubService, fake: FakeGitHub) -> dict:
+    fake.reset()
+    started = time.perf_counter()
+    analysis = await service.analyze_repo_structure("octo", "demo")
+    return {
+        "elapsed": time.perf_counter() - started,
+        "api_calls": sum(n for route, n in fake.calls.items() if route != "raw"),
+        "raw_calls": fake.calls["raw"],
+        "analysis": comparable(analysis),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="source files in the fake repo")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    args = parser.parse_args()
+
+    files = {
+        **DEFAULT_FILES,
+        "package.json": '{"dependencies": {"react": "^18.2.0"}}',
+        "docs/guide.md": "# Guide\n",
+        **{f"src/mod_{i}.py": f"VALUE = {i}\n" for i in range(args.files)},
+    }
+    fake = FakeGitHub(files=files, delay=args.latency)
+    await fake.start()
+    options = {"base_url": fake.base_url, "raw_url": fake.raw_url}
+    full = GitHubService("benchmark-token", **options)
+    incremental = GitHubService("benchmark-token", snapshots=MemorySnapshotStore(100, 64 * 2 ** 20), **options)
+    failed = False
+    try:
+        first = await analyze(incremental, fake)
+        print(f"{'first analysis':>26}: {first['api_calls']} API + {first['raw_calls']} raw calls, "
+              f"{first['elapsed'] * 1000:6.1f} ms (snapshot stored)")
+        for label, changes in STEPS:
+            if changes:
+                fake.commit(changes, label)
+            before = await analyze(full, fake)
+            after = await analyze(incremental, fake)
+            differing = sorted(key for key in before["analysis"]
+                               if before["analysis"][key] != after["analysis"].get(key))
+            failed = failed or bool(differing)
+            print(f"{label:>26}: full {before['api_calls']} API + {before['raw_calls']} raw, "
+                  f"{before['elapsed'] * 1000:6.1f} ms | incremental {after['api_calls']} API + "
+                  f"{after['raw_calls']} raw, {after['elapsed'] * 1000:6.1f} ms | "
+                  f"{'same result' if not differing else 'DIFFERS in ' + ', '.join(differing)}")
+    finally:
+        await full.close()
+        await incremental.close()
+        await fake.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
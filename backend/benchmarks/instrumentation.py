@@ -0,0 +1,75 @@
+"""Cost of the per-stage instrumentation, and what it reports for one request.
+
+Runs /analyze-repo against the fakes with Server-Timing on, prints the header
+and a slice of /metrics, then measures the overhead of a span.
+
+    cd backend && python -m benchmarks.instrumentation --requests 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SERVER_TIMING", "true")
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+from app.services.metrics import request_spans, span
+
+
+def span_overhead(iterations: int) -> float:
+    token = request_spans.set([])
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with span("benchmark"):
+            pass
+    elapsed = time.perf_counter() - started
+    request_spans.reset(token)
+    return elapsed / iterations
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub(delay=0.005)
+    await fake_github.start()
+    wire_fakes(fake_github, FakeModel(delay=0.05))
+    server = AppServer()
+    app_url = await server.start()
+    try:
+        async with ClientSession() as session:
+            body = {"repo_url": "https://github.com/octo/demo", "cache": "bypass"}
+            async with session.post(f"{app_url}/analyze-repo", json=body) as response:
+                assert response.status == 200, await response.text()
+                print(f"Server-Timing: {response.headers.get('Server-Timing')}")
+
+            started = time.perf_counter()
+            for i in range(args.requests):
+                async with session.post(f"{app_url}/analyze-repo", json=body) as response:
+                    await response.read()
+            per_request = (time.perf_counter() - started) / args.requests
+
+            async with session.get(f"{app_url}/metrics") as response:
+                text = await response.text()
+            lines = text.splitlines()
+            print(f"/metrics: {len(text)} bytes, {len(lines)} lines; stage counts:")
+            for line in lines:
+                if line.startswith("codecritic_stage_seconds_count") or line.startswith("codecritic_github_requests_total"):
+                    print(f"  {line}")
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+    overhead = span_overhead(100_000)
+    # ~10 spans per roast: analysis, tree, commits, issues, files, prompt, gemini
+    print(f"span overhead {overhead * 1e6:.2f} us; ~10 spans per request = "
+          f"{overhead * 10 / per_request * 100:.3f}% of a {per_request * 1000:.1f} ms request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
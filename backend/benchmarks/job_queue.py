@@ -0,0 +1,119 @@
+"""Synchronous endpoints vs the job queue under a slow Gemini.
+
+Fires a burst of roast requests both ways and reports how long clients hold
+a connection, health-check latency during the burst, 429s from the bounded
+queue, and the per-stage timings recorded on jobs.
+
+    cd backend && python -m benchmarks.job_queue --requests 50 --gemini-delay 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("JOB_WORKERS", "4")
+os.environ.setdefault("JOB_MAX_QUEUE", "20")
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+from app.config import settings
+
+
+def body(i: int) -> dict:
+    # Distinct repos so neither single-flight nor the result cache hides the load
+    return {"repo_url": f"https://github.com/octo/demo-{i}", "cache": "bypass"}
+
+
+def ms(values) -> str:
+    if not values:
+        return "     -"
+    return f"p50 {statistics.median(values) * 1000:7.1f} ms, max {max(values) * 1000:7.1f} ms"
+
+
+async def health_probe(session: ClientSession, app_url: str, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with session.get(f"{app_url}/") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def sync_request(session: ClientSession, app_url: str, i: int) -> float:
+    started = time.perf_counter()
+    async with session.post(f"{app_url}/analyze-repo", json=body(i)) as response:
+        assert response.status == 200, await response.text()
+        await response.read()
+    return time.perf_counter() - started
+
+
+async def job_request(session: ClientSession, app_url: str, i: int, submits: list, rejected: list):
+    started = time.perf_counter()
+    async with session.post(f"{app_url}/jobs/analyze-repo", json=body(i)) as response:
+        payload = await response.json()
+    submits.append(time.perf_counter() - started)
+    if response.status == 429:
+        rejected.append(i)
+        return None
+    assert response.status == 202, payload
+    while True:
+        await asyncio.sleep(0.1)
+        async with session.get(f"{app_url}{payload['poll']}") as response:
+            job = await response.json()
+        if job["status"] in ("done", "failed"):
+            return job
+
+
+async def burst(session, app_url, requests, make):
+    stop = asyncio.Event()
+    probe = asyncio.ensure_future(health_probe(session, app_url, stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(make(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return results, elapsed, await probe
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--gemini-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub()
+    await fake_github.start()
+    wire_fakes(fake_github, FakeModel(delay=args.gemini_delay))
+    server = AppServer()
+    app_url = await server.start()
+    try:
+        async with ClientSession() as session:
+            held, elapsed, health = await burst(
+                session, app_url, args.requests, lambda i: sync_request(session, app_url, i)
+            )
+            print(f"sync : {args.requests} requests in {elapsed:5.2f}s | connection held {ms(held)} | "
+                  f"health {ms(health)}")
+
+            submits, rejected = [], []
+            jobs, elapsed, health = await burst(
+                session, app_url, args.requests, lambda i: job_request(session, app_url, i, submits, rejected)
+            )
+            jobs = [job for job in jobs if job]
+            print(f"jobs : {len(jobs)} accepted, {len(rejected)} rejected with 429 "
+                  f"({settings.JOB_WORKERS} workers, queue {settings.JOB_MAX_QUEUE}) in {elapsed:5.2f}s | "
+                  f"submit {ms(submits)} | health {ms(health)}")
+            for stage in ("queued", "analysis", "generation", "total"):
+                values = [job["timings"][stage] / 1000 for job in jobs if stage in job["timings"]]
+                print(f"       {stage:<10} {ms(values)}")
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Sustained roast throughput vs number of Gemini API keys under per-key rate limits.
+
+Each key gets its own fake model that accepts --rate-limit calls per second
+and answers the rest with a 429 + Retry-After.
+
+    cd backend && python -m benchmarks.key_pool_throughput --keys 1 2 4 8
+"""
+import argparse
+import asyncio
+import time
+
+from . import _env  # noqa: F401
+from .fake_gemini import FakeModel
+from app.config import settings
+from app.services.ai_service import AIService
+
+
+async def run(keys: int, args) -> dict:
+    settings.GEMINI_API_KEYS = ",".join(f"fake-key-{i:04d}" for i in range(keys))
+    settings.AI_COALESCE_ROASTS = False
+    service = AIService()
+    models = {}
+
+    def factory(api_key: str):
+        models[api_key] = FakeModel(delay=args.gemini_delay, rate_limit=args.rate_limit)
+        return models[api_key]
+
+    service.key_pool.use_model_factory(factory)
+    deadline = time.monotonic() + args.duration
+    completed = failed = 0
+
+    async def client(worker: int):
+        nonlocal completed, failed
+        i = 0
+        while time.monotonic() < deadline:
+            analysis = {"file_structure": [f"worker{worker}-{i}.py"]}
+            roast = await service.generate_roast(analysis)
+            if roast.startswith("Failed") or roast.startswith("All API keys"):
+                failed += 1
+            else:
+                completed += 1
+            i += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(worker) for worker in range(args.concurrency)))
+    elapsed = time.monotonic() - started
+    return {
+        "throughput": completed / elapsed,
+        "failed": failed,
+        "per_key": [(k["requests"], k["rate_limited"]) for k in service.key_pool.stats()],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rate-limit", type=int, default=5, help="calls per key per second")
+    parser.add_argument("--gemini-delay", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    for keys in args.keys:
+        stats = await run(keys, args)
+        print(f"{keys:>2} keys: {stats['throughput']:6.1f} roasts/s, {stats['failed']} failed, "
+              f"per-key (requests, 429s) {stats['per_key']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Memory and bytes downloaded when a repo commits huge README / manifest / .env files.
+
+The fake GitHub generates the files on the fly (nothing is held in memory
+on that side), so tracemalloc's peak is what the analysis itself allocates.
+Capped mode must stay under --max-peak-mb; the uncapped run (on smaller
+--uncapped-mb files, since it reads them whole) shows what the same repo
+costs without GITHUB_MAX_FILE_BYTES.
+
+    cd backend && python -m benchmarks.large_files --size-mb 300
+"""
+import argparse
+import asyncio
+import resource
+import sys
+import time
+import tracemalloc
+
+from . import _env  # noqa: F401
+from .fake_github import FakeGitHub
+from app.config import settings
+from app.services.github_service import GitHubService
+
+
+async def run(fake: FakeGitHub, snapshot_api: str, max_file_bytes: int) -> dict:
+    settings.GITHUB_MAX_FILE_BYTES = max_file_bytes
+    fake.bytes_served = 0
+    service = GitHubService("benchmark-token", base_url=fake.base_url, raw_url=fake.raw_url,
+                            snapshot_api=snapshot_api)
+    await service.start()
+    tracemalloc.start()
+    started = time.perf_counter()
+    analysis = await service.analyze_repo_structure("octo", "huge")
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await service.close()
+    assert analysis["has_readme"] and analysis["manifests"]
+    return {
+        "elapsed": elapsed,
+        "peak_mb": peak / 2 ** 20,
+        "served_mb": fake.bytes_served / 2 ** 20,
+        "readme_chars": len(analysis["readme_content"]),
+        "package_chars": sum(len(text) for text in analysis["manifests"].values()),
+    }
+
+
+def report(label: str, result: dict):
+    print(f"{label:>32}: {result['elapsed']:6.2f}s, peak {result['peak_mb']:7.1f} MB allocated, "
+          f"{result['served_mb']:7.1f} MB sent by GitHub, README kept {result['readme_chars']} chars, "
+          f"manifest {result['package_chars']} chars")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--max-peak-mb", type=float, default=32.0)
+    parser.add_argument("--uncapped-mb", type=int, default=50, help="0 skips the uncapped run")
+    args = parser.parse_args()
+
+    settings.GITHUB_REQUEST_TIMEOUT = 600
+    fake = FakeGitHub(files={"main.py": "print('hi')\n"})
+    await fake.start()
+    failed = False
+    max_file_bytes = settings.GITHUB_MAX_FILE_BYTES
+    try:
+        fake.large_files = dict.fromkeys(("README.md", "package.json", ".env"), args.size_mb * 2 ** 20)
+        for snapshot_api in ("rest", "graphql"):
+            result = await run(fake, snapshot_api, max_file_bytes)
+            report(f"{args.size_mb} MB files, {snapshot_api}, capped", result)
+            if result["peak_mb"] > args.max_peak_mb:
+                print(f"  FAIL: peak above {args.max_peak_mb} MB")
+                failed = True
+        if args.uncapped_mb:
+            fake.large_files = dict.fromkeys(("README.md", "package.json", ".env"), args.uncapped_mb * 2 ** 20)
+            report(f"{args.uncapped_mb} MB files, rest, uncapped", await run(fake, "rest", 2 ** 62))
+    finally:
+        await fake.stop()
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+"""Load test /analyze-repo and /generate-readme at fixed concurrency levels.
+
+The app runs in-process under uvicorn against the local GitHub and Gemini
+fakes, whose latency, error rate and rate limits are set from the command
+line. Each (endpoint, concurrency) level reports p50/p95/p99 latency,
+throughput, upstream calls and peak RSS, and the whole run is written as
+JSON so two commits can be compared:
+
+    cd backend && python -m benchmarks.load_test --concurrency 1 8 32 --requests 200
+    cd backend && python -m benchmarks.load_test --compare benchmarks/results/load-<old sha>.json
+
+Every request targets its own repo with cache=bypass by default, so
+single-flight, snapshots and the result cache do not hide the work; pass
+--repos to make requests share repos. RSS is the whole benchmark process
+(app, client and fakes together).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+from collections import Counter
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+from app.config import settings
+
+REQUEST_BODIES = {
+    "analyze-repo": {},
+    "generate-readme": {
+        "project_description": "A demo service",
+        "features": "Roasts code",
+        "setup": "pip install -r requirements.txt",
+        "environment": "GITHUB_TOKEN",
+    },
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    # Nearest rank, so p99 of 100 samples is the 99th slowest, not an interpolation
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # No procfs (macOS): the process high-water mark, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+async def sample_rss(peak: list, interval: float = 0.05):
+    while True:
+        peak[0] = max(peak[0], rss_mb())
+        await asyncio.sleep(interval)
+
+
+async def run_level(session: ClientSession, app_url: str, endpoint: str, concurrency: int,
+                    requests: int, repos: int, cache: str, fake_github: FakeGitHub, fake_model: FakeModel) -> dict:
+    fake_github.reset()
+    gemini_calls, gemini_rejected, gemini_errors = fake_model.calls, fake_model.rejected, fake_model.errors
+    latencies, statuses = [], Counter()
+    next_request = iter(range(requests))
+
+    async def client():
+        for i in next_request:
+            repo = f"load-{endpoint}-{concurrency}-{i % repos if repos else i}"
+            body = {"repo_url": f"https://github.com/octo/{repo}", "cache": cache, **REQUEST_BODIES[endpoint]}
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{app_url}/{endpoint}", json=body) as response:
+                    await response.read()
+                    statuses[str(response.status)] += 1
+            except asyncio.TimeoutError:
+                statuses["timeout"] += 1
+            except ClientError:
+                statuses["connection_error"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    peak = [rss_mb()]
+    sampler = asyncio.ensure_future(sample_rss(peak))
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    peak[0] = max(peak[0], rss_mb())
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": {
+            name: round(percentile(latencies, fraction) * 1000, 1)
+            for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        },
+        "upstream": {
+            "github_calls": sum(fake_github.calls.values()),
+            "github_by_route": dict(fake_github.calls),
+            "github_errors": fake_github.errors,
+            "github_throttled": sum(fake_github.throttled.values()),
+            "gemini_calls": fake_model.calls - gemini_calls,
+            "gemini_rejected": fake_model.rejected - gemini_rejected,
+            "gemini_errors": fake_model.errors - gemini_errors,
+        },
+        "peak_rss_mb": round(peak[0], 1),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report(level: dict):
+    latency, upstream = level["latency_ms"], level["upstream"]
+    print(f"{level['endpoint']:>16} x{level['concurrency']:<3} | p50 {latency['p50']:7.1f} p95 {latency['p95']:7.1f} "
+          f"p99 {latency['p99']:7.1f} ms | {level['throughput_rps']:7.2f} req/s | "
+          f"GitHub {upstream['github_calls']:5} calls, Gemini {upstream['gemini_calls']:4} calls | "
+          f"RSS {level['peak_rss_mb']:6.1f} MB | {level['statuses']}")
+
+
+def compare(previous: dict, current: dict):
+    before = {(level["endpoint"], level["concurrency"]): level for level in previous["results"]}
+    print(f"\nvs {previous['commit']} ({previous['started_at']}):")
+    for level in current["results"]:
+        old = before.get((level["endpoint"], level["concurrency"]))
+        if old is None:
+            continue
+
+        def change(new: float, base: float) -> str:
+            return f"{(new - base) / base * 100:+6.1f}%" if base else "   n/a"
+
+        print(f"{level['endpoint']:>16} x{level['concurrency']:<3} | "
+              f"p50 {change(level['latency_ms']['p50'], old['latency_ms']['p50'])} "
+              f"p95 {change(level['latency_ms']['p95'], old['latency_ms']['p95'])} "
+              f"p99 {change(level['latency_ms']['p99'], old['latency_ms']['p99'])} | "
+              f"throughput {change(level['throughput_rps'], old['throughput_rps'])} | "
+              f"GitHub calls {change(level['upstream']['github_calls'], old['upstream']['github_calls'])} | "
+              f"RSS {change(level['peak_rss_mb'], old['peak_rss_mb'])}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(REQUEST_BODIES), default=sorted(REQUEST_BODIES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per level")
+    parser.add_argument("--repos", type=int, default=0, help="distinct repos per level (0: one per request)")
+    parser.add_argument("--cache", choices=["bypass", "prefer"], default="bypass")
+    parser.add_argument("--github-latency", type=float, default=0.02)
+    parser.add_argument("--github-error-rate", type=float, default=0.0)
+    parser.add_argument("--github-quota", type=int, default=0, help="API calls per token per window (0: unlimited)")
+    parser.add_argument("--github-quota-window", type=float, default=60.0)
+    parser.add_argument("--github-secondary-limit", type=int, default=0)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-rate-limit", type=int, default=0, help="calls per --gemini-window (0: unlimited)")
+    parser.add_argument("--gemini-window", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/load-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    # Identical fake repos must not be merged into one generation
+    settings.AI_COALESCE_ROASTS = False
+    fake_github = FakeGitHub(
+        delay=args.github_latency, error_rate=args.github_error_rate, seed=args.seed,
+        quota=args.github_quota, quota_window=args.github_quota_window,
+        secondary_limit=args.github_secondary_limit,
+    )
+    fake_model = FakeModel(
+        delay=args.gemini_latency, error_rate=args.gemini_error_rate, seed=args.seed,
+        rate_limit=args.gemini_rate_limit, window=args.gemini_window,
+    )
+    await fake_github.start()
+    wire_fakes(fake_github, fake_model)
+    server = AppServer()
+    app_url = await server.start()
+    run = {
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": [],
+    }
+    try:
+        # Drop idle connections before uvicorn's 5s keep-alive does, or a reused one can be closed mid-request
+        connector = TCPConnector(limit=0, keepalive_timeout=2)
+        async with ClientSession(connector=connector, timeout=ClientTimeout(total=args.timeout)) as session:
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    level = await run_level(session, app_url, endpoint, concurrency, args.requests,
+                                            args.repos, args.cache, fake_github, fake_model)
+                    run["results"].append(level)
+                    report(level)
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+    output = args.output or os.path.join("benchmarks", "results", f"load-{run['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"results written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), run)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Roast prompt size and generation latency with the token budget on and off.
+
+Synthetic repos of 10 to 100k files with a long README and a big manifest,
+shaped like GitHubService's analysis (root listing plus recursive tree);
+the fake model's latency grows with prompt size.
+
+    cd backend && python -m benchmarks.prompt_budget --files 10 1000 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from . import _env  # noqa: F401
+from .fake_gemini import FakeModel
+from app.config import settings
+from app.services.ai_service import AIService
+from app.services.repo_tree import RepoTree
+
+
+def synthetic_analysis(files: int) -> dict:
+    directories = ["src", "tests", "docs", "scripts", "packages/core", "packages/ui"]
+    root_files = ["README.md", "package.json"]
+    paths = root_files + [f"{directories[i % len(directories)]}/module_{i}.py" for i in range(files)]
+    # Root entries as the tree call reports them: top-level directories and files
+    root = ([(name, "dir", 0) for name in sorted({d.split('/')[0] for d in directories})]
+            + [(name, "file", 0) for name in root_files])
+    tree = RepoTree(paths, root=root)
+    readme = "# Project\n\nIntro paragraph.\n\n" + "".join(
+        f"## Section {i}\n\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n" * 20
+        for i in range(max(1, files // 100))
+    )
+    package = json.dumps({"dependencies": {f"package-{i}": f"^{i % 9}.0.0" for i in range(max(5, files // 50))}})
+    return {
+        "file_structure": [name for name, _, _ in tree.root],
+        "tree": tree,
+        "has_readme": True,
+        "readme_content": readme,
+        "recent_commits": [{"message": f"commit {i}", "author": "dev"} for i in range(5)],
+        "open_issues": [{"title": f"issue {i}", "state": "open"} for i in range(5)],
+        "exposed_secrets": [],
+        "manifests": {"package.json": package},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--budget", type=int, default=8000)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=20.0)
+    args = parser.parse_args()
+
+    settings.AI_COALESCE_ROASTS = False
+    service = AIService()
+    service.key_pool.use_model_factory(
+        lambda api_key: FakeModel(delay=0.2, delay_per_1k_tokens=args.ms_per_1k_tokens / 1000)
+    )
+    print(f"{'files':>7} | {'budget':>7} | {'prompt tokens':>13} | {'build ms':>8} | {'generate ms':>11} | truncated")
+    for files in args.files:
+        for budget in (0, args.budget):
+            settings.AI_PROMPT_TOKEN_BUDGET = budget
+            analysis = synthetic_analysis(files)
+            started = time.perf_counter()
+            service._create_roast_prompt(analysis)
+            build = time.perf_counter() - started
+            started = time.perf_counter()
+            await service.generate_roast(analysis)
+            generate = time.perf_counter() - started
+            stats = analysis["prompt_stats"]
+            print(f"{files:>7} | {budget or 'off':>7} | {stats['estimated_tokens']:>13} | {build * 1000:8.1f} | "
+                  f"{generate * 1000:11.1f} | {', '.join(stats['truncated_sections']) or '-'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
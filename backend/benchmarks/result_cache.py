@@ -0,0 +1,50 @@
+"""Latency of repeat roasts/READMEs for an unchanged commit with the AI result cache.
+
+    cd backend && python -m benchmarks.result_cache --gemini-delay 2
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gemini-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub()
+    await fake_github.start()
+    fake_model = FakeModel(delay=args.gemini_delay)
+    wire_fakes(fake_github, fake_model)
+    server = AppServer()
+    app_url = await server.start()
+    body = {"repo_url": "https://github.com/octo/demo", "project_description": "A demo"}
+    try:
+        async with ClientSession() as session:
+            async def call(endpoint: str, cache: str):
+                started = time.perf_counter()
+                async with session.post(f"{app_url}/{endpoint}", json={**body, "cache": cache}) as response:
+                    payload = await response.json()
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"  {endpoint:<16} cache={cache:<7} -> {response.status} {elapsed:8.1f} ms  "
+                      f"{payload.get('cache') or payload.get('detail')}")
+
+            for endpoint in ("analyze-repo", "generate-readme"):
+                await call(endpoint, "only")
+                await call(endpoint, "prefer")
+                await call(endpoint, "prefer")
+                await call(endpoint, "bypass")
+        print(f"  Gemini calls: {fake_model.calls}")
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
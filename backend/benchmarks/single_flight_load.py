@@ -0,0 +1,56 @@
+"""Fire concurrent identical /analyze-repo requests and count upstream calls.
+
+The app runs in-process under uvicorn with the GitHub API and Gemini replaced
+by local fakes, so the numbers only reflect request coalescing.
+
+    cd backend && python -m benchmarks.single_flight_load --clients 50
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+from app.services import get_ai_service, get_github_service
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--github-delay", type=float, default=0.05)
+    parser.add_argument("--gemini-delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub(delay=args.github_delay)
+    await fake_github.start()
+    fake_model = FakeModel(delay=args.gemini_delay)
+    wire_fakes(fake_github, fake_model)
+    github_service, ai_service = get_github_service(), get_ai_service()
+    server = AppServer()
+    app_url = await server.start()
+    try:
+        async with ClientSession() as session:
+            async def analyze():
+                async with session.post(f"{app_url}/analyze-repo",
+                                        json={"repo_url": "https://github.com/octo/demo"}) as response:
+                    return response.status
+
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(analyze() for _ in range(args.clients)))
+            elapsed = time.perf_counter() - started
+
+        print(f"{args.clients} concurrent identical requests in {elapsed * 1000:.0f} ms, "
+              f"statuses {sorted(set(statuses))}")
+        print(f"  GitHub upstream calls: {sum(fake_github.calls.values())} "
+              f"(analyses {github_service.analysis_flight.stats()})")
+        print(f"  Gemini upstream calls: {fake_model.calls} (roasts {ai_service.roast_flight.stats()})")
+    finally:
+        await server.stop()
+        await fake_github.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
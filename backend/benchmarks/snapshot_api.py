@@ -0,0 +1,78 @@
+"""Round-trips and latency of a repo snapshot: REST (tree or contents) vs one GraphQL query.
+
+The fake GitHub adds --latency to every request to stand in for the network.
+
+    cd backend && python -m benchmarks.snapshot_api --latency 0.08 --runs 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from . import _env  # noqa: F401
+from .fake_github import DEFAULT_FILES, FakeGitHub
+from app.services.github_service import GitHubService
+
+FILES = {
+    **DEFAULT_FILES,
+    "package.json": '{"dependencies": {"react": "^18.2.0", "next": "^14.0.0"}}',
+    ".env.local": 'NEXT_PUBLIC_API="https://example.com"\n',
+    "src/index.ts": "export {}\n",
+}
+
+MODES = {
+    "rest (tree)": {"snapshot_api": "rest", "use_tree": True},
+    "rest (contents)": {"snapshot_api": "rest", "use_tree": False},
+    "graphql": {"snapshot_api": "graphql"},
+}
+
+
+async def run(fake: FakeGitHub, options: dict, runs: int, concurrency: int) -> dict:
+    service = GitHubService("benchmark-token", base_url=fake.base_url, raw_url=fake.raw_url,
+                            fanout_concurrency=concurrency, **options)
+    await service.start()
+    fake.reset()
+    latencies = []
+    for i in range(runs):
+        started = time.perf_counter()
+        # A new repo name each run so single-flight and caches stay out of it
+        analysis = await service.analyze_repo_structure("octo", f"demo-{i}")
+        latencies.append(time.perf_counter() - started)
+        assert analysis and analysis["has_readme"] and analysis["recent_commits"]
+    await service.close()
+    return {
+        "calls": sum(fake.calls.values()) / runs,
+        "api_calls": sum(n for route, n in fake.calls.items() if route != "raw") / runs,
+        "median": statistics.median(latencies),
+        "analysis": analysis,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds added to every request")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8],
+                        help="REST fan-out concurrency (1 = the old serial behaviour)")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(files=FILES, delay=args.latency)
+    await fake.start()
+    results = {}
+    try:
+        for concurrency in args.concurrency:
+            for label, options in MODES.items():
+                result = await run(fake, options, args.runs, concurrency)
+                results[label] = result
+                print(f"fan-out {concurrency:2} | {label:>16}: {result['calls']:4.1f} requests "
+                      f"({result['api_calls']:.1f} charged to the API quota), median {result['median'] * 1000:7.1f} ms")
+    finally:
+        await fake.stop()
+
+    rest, graphql = results["rest (contents)"]["analysis"], results["graphql"]["analysis"]
+    differing = sorted(key for key in set(rest) | set(graphql) if key != "full_name" and rest.get(key) != graphql.get(key))
+    print(f"rest (contents) vs graphql analysis: {'identical' if not differing else 'differs in ' + ', '.join(differing)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Cold start: how long importing the app takes and when GET / first answers.
+
+Every run is a fresh interpreter (like a new Render instance): one imports
+app.main and reports which heavy SDKs came with it, the other starts
+uvicorn and polls the health check until it returns 200.
+
+    cd backend && python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from . import _env  # noqa: F401
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "genai_loaded": "google.generativeai" in sys.modules}))
+"""
+
+
+def import_time() -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_healthy(timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"GET / did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # The child interpreters import the app from here, with the benchmark credentials
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))
+    imports = [import_time() for _ in range(args.runs)]
+    healthy = [time_to_healthy(args.timeout) for _ in range(args.runs)]
+    print(f"import app.main: median {statistics.median(i['seconds'] for i in imports) * 1000:7.1f} ms, "
+          f"google.generativeai imported: {imports[0]['genai_loaded']}")
+    print(f"first healthy GET /: median {statistics.median(healthy) * 1000:7.1f} ms "
+          f"(min {min(healthy) * 1000:.1f}, max {max(healthy) * 1000:.1f})")
+
+
+if __name__ == "__main__":
+    main()
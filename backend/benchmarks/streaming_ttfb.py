@@ -0,0 +1,91 @@
+"""Time-to-first-chunk of the SSE endpoints vs the blocking ones, with a fake Gemini.
+
+Exits non-zero unless the first chunk arrives within half the generation
+time and the final `done` event carries the same payload as the blocking
+endpoint.
+
+    cd backend && python -m benchmarks.streaming_ttfb --gemini-delay 4
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from aiohttp import ClientSession
+
+from .app_server import AppServer, wire_fakes
+from .fake_gemini import FakeModel
+from .fake_github import FakeGitHub
+
+
+async def blocking(session: ClientSession, url: str, body: dict):
+    started = time.perf_counter()
+    async with session.post(url, json=body) as response:
+        assert response.status == 200, await response.text()
+        payload = await response.json()
+    return time.perf_counter() - started, payload
+
+
+async def streaming(session: ClientSession, url: str, body: dict) -> dict:
+    started = time.perf_counter()
+    marks = {}
+    text = []
+    async with session.post(url, json=body) as response:
+        assert response.status == 200, await response.text()
+        event = None
+        async for raw in response.content:
+            line = raw.decode().rstrip("\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                marks.setdefault(event, time.perf_counter() - started)
+            elif line.startswith("data: ") and event == "chunk":
+                text.append(line)
+            elif line.startswith("data: ") and event == "done":
+                marks["payload"] = json.loads(line[len("data: "):])
+    marks["chunks"] = len(text)
+    return marks
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gemini-delay", type=float, default=2.0, help="total generation time in seconds")
+    parser.add_argument("--chunks", type=int, default=16)
+    args = parser.parse_args()
+
+    fake_github = FakeGitHub()
+    await fake_github.start()
+    wire_fakes(fake_github, FakeModel(delay=args.gemini_delay, text="roast " * 200, chunks=args.chunks))
+    server = AppServer()
+    app_url = await server.start()
+    body = {"repo_url": "https://github.com/octo/demo", "project_description": "A demo", "cache": "bypass"}
+    failed = False
+    try:
+        async with ClientSession() as session:
+            for endpoint in ("analyze-repo", "generate-readme"):
+                total, payload = await blocking(session, f"{app_url}/{endpoint}", body)
+                marks = await streaming(session, f"{app_url}/{endpoint}/stream", body)
+                if "chunk" not in marks or "done" not in marks:
+                    print(f"{endpoint}: FAIL: stream ended without chunk/done events ({sorted(marks)})")
+                    failed = True
+                    continue
+                print(f"{endpoint}: blocking {total * 1000:7.1f} ms | stream: analysis "
+                      f"{marks['analysis'] * 1000:6.1f} ms, first chunk {marks['chunk'] * 1000:6.1f} ms, "
+                      f"done {marks['done'] * 1000:7.1f} ms ({marks['chunks']} chunks)")
+                if marks["chunk"] >= args.gemini_delay / 2:
+                    print(f"  FAIL: first chunk after {marks['chunk']:.2f}s, not under half the "
+                          f"{args.gemini_delay}s generation")
+                    failed = True
+                if marks.get("payload") != payload:
+                    differing = sorted(key for key in set(payload) | set(marks.get("payload") or {})
+                                       if payload.get(key) != (marks.get("payload") or {}).get(key))
+                    print(f"  FAIL: done payload differs from the blocking response in {differing}")
+                    failed = True
+    finally:
+        await server.stop()
+        await fake_github.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())